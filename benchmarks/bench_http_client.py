@@ -0,0 +1,131 @@
+"""
+HTTP client benchmark
+Compares bare requests.get() calls with the shared pooled client in tools/http_client.py
+against a local stub of the NASA /search endpoint.
+
+The stub can add an artificial per-connection setup delay (--handshake-ms) to
+emulate the TCP + TLS handshake cost of talking to images-api.nasa.gov; with
+pooling that cost is paid once per connection instead of once per call.
+
+A per-request delay (--latency-ms) emulates upstream response time; the async
+section shows N concurrent calls finishing in roughly the time of one.
+
+Usage:
+    python benchmarks/bench_http_client.py --calls 200 --handshake-ms 40
+    python benchmarks/bench_http_client.py --latency-ms 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+SEARCH_BODY = json.dumps({
+    "collection": {
+        "metadata": {"total_hits": 1},
+        "items": [{
+            "data": [{"nasa_id": "as11-40-5903", "title": "Apollo 11", "media_type": "image"}],
+            "links": [{"href": "http://127.0.0.1/thumb.jpg"}]
+        }]
+    }
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+    response_delay = 0.0
+
+    def setup(self):
+        # Runs once per accepted connection - emulates handshake latency
+        time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_GET(self):
+        time.sleep(self.response_delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(SEARCH_BODY)))
+        self.end_headers()
+        self.wfile.write(SEARCH_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(handshake_ms: float, latency_ms: float = 0.0):
+    StubHandler.handshake_delay = handshake_ms / 1000.0
+    StubHandler.response_delay = latency_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(label, fetch, url, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fetch(url)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {calls} calls in {elapsed:6.2f}s  -> {calls / elapsed:8.1f} calls/s")
+    return calls / elapsed
+
+
+async def run_async(url, concurrency):
+    from tools import http_client
+
+    # Distinct URLs, so identical concurrent requests are not coalesced into
+    # one upstream call (http_client.singleflight) and the pool does the work
+    start = time.perf_counter()
+    for n in range(concurrency):
+        await http_client.aget_json(f"{url}&i=s{n}")
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(*(http_client.aget_json(f"{url}&i=c{n}") for n in range(concurrency)))
+    concurrent = time.perf_counter() - start
+
+    print(f"{'async sequential':<28} {concurrency} calls in {sequential:6.2f}s")
+    print(f"{'async concurrent (gather)':<28} {concurrency} calls in {concurrent:6.2f}s")
+    await http_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_stub(args.handshake_ms, args.latency_ms)
+    url = f"http://127.0.0.1:{server.server_address[1]}/search?q=apollo"
+
+    from tools import http_client
+
+    def bare(u):
+        response = requests.get(u, timeout=15)
+        response.raise_for_status()
+        return response.json()
+
+    print(f"Stub server: {url} (handshake delay {args.handshake_ms:.0f} ms)\n")
+    before = run("bare requests.get", bare, url, args.calls)
+    after = run("pooled http_client", http_client.get_json, url, args.calls)
+    print(f"\nSpeedup: {after / before:.1f}x\n")
+    asyncio.run(run_async(url, args.concurrency))
+
+    http_client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Search result projection benchmark
+Measures the JSON response size and build + serialization time of a
+100-item search_nasa_images page for each detail= level.
+
+The page is synthetic but shaped like real /search output: every item has
+data[0] with a multi-KB description, keywords and center, plus links and href.
+
+Usage:
+    python benchmarks/bench_search_projection.py --items 100 --description-bytes 3000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.search_tools import DETAIL_LEVELS, format_search_item
+
+WORDS = ("apollo lunar module astronaut surface orbit crew mission command service "
+         "earth moon landing spacecraft photograph camera hasselblad panorama").split()
+
+
+def make_page(items: int, description_bytes: int) -> dict:
+    rng = random.Random(42)
+    page = []
+    for i in range(items):
+        description = ""
+        while len(description) < description_bytes:
+            description += rng.choice(WORDS) + " "
+        nasa_id = f"as11-40-{5800 + i}"
+        page.append({
+            "href": f"https://images-assets.nasa.gov/image/{nasa_id}/collection.json",
+            "data": [{
+                "center": "JSC",
+                "title": f"Apollo 11 Mission image {i}",
+                "nasa_id": nasa_id,
+                "date_created": "1969-07-20T00:00:00Z",
+                "keywords": ["Apollo 11", "Moon", "Lunar Module", "Buzz Aldrin"],
+                "media_type": "image",
+                "description_508": description[:200],
+                "secondary_creator": "Neil A. Armstrong",
+                "description": description
+            }],
+            "links": [{
+                "href": f"https://images-assets.nasa.gov/image/{nasa_id}/{nasa_id}~thumb.jpg",
+                "rel": "preview",
+                "render": "image"
+            }]
+        })
+    return {"collection": {"metadata": {"total_hits": 1509}, "items": page}}
+
+
+def measure(data: dict, fields, max_description, rounds: int):
+    build_time = 0.0
+    serialize_time = 0.0
+    payload = b""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [format_search_item(item, fields, max_description) for item in data["collection"]["items"]]
+        response = {"total_hits": 1509, "returned_results": len(results), "results": results}
+        build_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        payload = json.dumps(response).encode("utf-8")
+        serialize_time += time.perf_counter() - start
+    return len(payload), build_time / rounds * 1000, serialize_time / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--description-bytes", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    data = make_page(args.items, args.description_bytes)
+    print(f"{args.items} items, ~{args.description_bytes} byte descriptions, {args.rounds} rounds\n")
+    print(f"{'detail':<12} {'bytes':>10} {'build ms':>10} {'json ms':>10}")
+
+    for detail, (fields, max_description) in DETAIL_LEVELS.items():
+        size, build_ms, serialize_ms = measure(data, fields, max_description, args.rounds)
+        print(f"{detail:<12} {size:>10,} {build_ms:>10.3f} {serialize_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Streaming /search parse benchmark
+Compares response.json()-style parsing (join the whole body, json.loads,
+then pick fields) with tools/stream_json.SearchStreamParser on the same
+synthetic /search page, delivered in network-sized chunks.
+
+Reports peak Python memory (tracemalloc), CPU parse time, and
+time-to-first-item over a simulated link (--link-mbps): the full parse
+can only start once the last byte has arrived, while the streaming parser
+emits the first item after its first few KB. (That head start only reaches
+code iterating nasa_api.stream_search item by item; iter_search_pages and
+the harvester consume whole pages and gain the memory savings.)
+
+Usage:
+    python benchmarks/bench_stream_parse.py --items 100 --description-bytes 3000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_search_projection import make_page
+from tools.stream_json import SearchStreamParser, slim_item
+
+
+def chunked(body: bytes, chunk_size: int):
+    for i in range(0, len(body), chunk_size):
+        yield body[i:i + chunk_size]
+
+
+def parse_full(chunks):
+    """What response.json() does: buffer everything, decode, then extract."""
+    body = b"".join(chunks)
+    data = json.loads(body)
+    items = [slim_item(item) for item in data["collection"]["items"]]
+    return items, len(body)
+
+
+def parse_streaming(chunks):
+    parser = SearchStreamParser(slim=True)
+    items = []
+    first_at = None
+    received = 0
+    for chunk in chunks:
+        received += len(chunk)
+        new_items = parser.feed(chunk)
+        if new_items and first_at is None:
+            first_at = received
+        items.extend(new_items)
+    parser.close()
+    return items, first_at
+
+
+def measure(fn, body, chunk_size):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(chunked(body, chunk_size))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--description-bytes", type=int, default=3000)
+    parser.add_argument("--chunk-size", type=int, default=16384)
+    parser.add_argument("--link-mbps", type=float, default=50.0)
+    args = parser.parse_args()
+
+    body = json.dumps(make_page(args.items, args.description_bytes)).encode("utf-8")
+    bytes_per_second = args.link_mbps * 1_000_000 / 8
+    transfer = len(body) / bytes_per_second
+    gc.collect()
+
+    (full_items, _), full_cpu, full_peak = measure(parse_full, body, args.chunk_size)
+    (stream_items, first_at), stream_cpu, stream_peak = measure(parse_streaming, body, args.chunk_size)
+    assert full_items == stream_items
+
+    print(f"/search page: {args.items} items, {len(body):,} bytes, {args.chunk_size:,} byte chunks, "
+          f"{args.link_mbps:g} Mbit/s link\n")
+    print(f"{'parser':<12} {'peak KiB':>10} {'cpu ms':>10} {'first item ms':>15}")
+    print(f"{'json.loads':<12} {full_peak / 1024:>10,.0f} {full_cpu * 1000:>10.2f} "
+          f"{(transfer + full_cpu) * 1000:>15.1f}")
+    print(f"{'streaming':<12} {stream_peak / 1024:>10,.0f} {stream_cpu * 1000:>10.2f} "
+          f"{(first_at / bytes_per_second) * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Per-tool benchmark
+Drives every NASA tool and the nasa://thumbnail resource against the
+fixture stub (benchmarks/nasa_stub.py), both directly (calling the tool
+functions in-process) and through a real MCP client session to
+mcp_server.py over the http transport, and reports per tool: calls,
+errors, throughput, p50 / p95 / p99 latency and peak RSS.
+
+Peak RSS is the highest resident set size sampled while that tool was
+running - of this process in direct mode, of the server process in mcp
+mode (Linux /proc; elsewhere direct mode falls back to the process peak).
+
+Arguments rotate over the recorded fixtures, so each tool's first calls for
+a nasa_id or query miss the caches and later ones hit them (download_asset
+finds the file already complete). --cold clears the caches, the thumbnail
+blob cache and the downloads before every direct call instead. The stub's latency, jitter and
+error injection are seeded, so runs with the same flags are repeatable.
+
+Usage:
+    python benchmarks/bench_tools.py
+    python benchmarks/bench_tools.py --mode direct --calls 200 --concurrency 8 --latency-ms 80
+    python benchmarks/bench_tools.py --tools get_item get_metadata --error-rate 0.05 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_transport import percentile, start_server
+from nasa_stub import Fixtures, start_stub
+
+
+RESOURCE_PREFIX = "nasa://"
+
+
+def tool_cases(fixtures: Fixtures) -> list:
+    """
+    (tool name, args for call i) for every tool, in an order where later tools can reuse earlier work.
+
+    Resources are listed by URI template (nasa://...) with the template's parameters as args.
+    """
+    media_types = fixtures.media_types()
+    images = [i for i in fixtures.ids("asset") if media_types.get(i) != 'video'] or ["as11-40-5903"]
+    videos = fixtures.ids("captions") or ["missing"]
+    queries = [slug.replace("-", " ") for slug in fixtures.searches] or ["apollo 11"]
+    caption_queries = ["eagle has landed", "small step", "tranquility base"]
+
+    def pick(values, i):
+        return values[i % len(values)]
+
+    return [
+        ("search_nasa_images", lambda i: {"query": pick(queries, i), "page": 1 + i // len(queries) % 2}),
+        ("search_nasa_images_all", lambda i: {"query": pick(queries, i), "max_results": 50}),
+        ("search_apollo11_specific", lambda i: {"query": pick(["", "moon", "eva"], i)}),
+        ("get_apollo11_resources", lambda i: {"page_size": 10}),
+        ("get_famous_nasa_images", lambda i: {}),
+        ("get_image_details", lambda i: {"nasa_id": pick(images, i)}),
+        ("get_image_details_many", lambda i: {"nasa_ids": images}),
+        ("get_metadata", lambda i: {"nasa_id": pick(images, i), "profile": pick(["full", "summary", "camera"], i)}),
+        ("get_item", lambda i: {"nasa_id": pick(images + videos, i)}),
+        ("get_video_details", lambda i: {"nasa_id": pick(videos, i)}),
+        ("get_captions", lambda i: {"nasa_id": pick(videos, i)}),
+        ("get_caption_cues", lambda i: {"nasa_id": pick(videos, i), "query": pick(caption_queries, i)}),
+        ("search_captions", lambda i: {"query": pick(caption_queries, i)}),
+        ("get_thumbnail", lambda i: {"nasa_id": pick(images + videos, i)}),
+        ("nasa://thumbnail/{nasa_id}", lambda i: {"nasa_id": pick(images, i)}),
+        ("download_asset", lambda i: {"nasa_id": pick(images + videos, i), "variant": pick(["orig", "large"], i)}),
+        ("get_cache_stats", lambda i: {}),
+        ("get_metrics", lambda i: {"format": pick(["json", "openmetrics"], i)}),
+        ("get_trace", lambda i: {"limit": 5})
+    ]
+
+
+def rss_bytes(pid: int):
+    """Current resident set size of pid, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class RSSSampler:
+    """Track the peak RSS of a process from a background thread."""
+
+    def __init__(self, pid: int, interval: float = 0.005):
+        self.pid = pid
+        self.interval = interval
+        self.peak = rss_bytes(pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if self.peak is None and self.pid == os.getpid():
+            # No /proc: fall back to the process-lifetime peak (KiB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = peak if sys.platform == "darwin" else peak * 1024
+
+
+def is_error(result) -> bool:
+    if isinstance(result, dict):
+        return bool(result.get('error'))
+    structured = getattr(result, 'structured_content', None)
+    return bool(getattr(result, 'is_error', False)) or (isinstance(structured, dict) and bool(structured.get('error')))
+
+
+async def bench_tool(call, args_for, calls: int, concurrency: int, pid: int, warmup: int, before_call=None) -> dict:
+    """Run calls invocations of one tool with concurrency workers and collect its numbers."""
+    for i in range(warmup):
+        await call(args_for(i))
+    latencies, errors, next_call = [], [], [0]
+
+    async def worker():
+        while next_call[0] < calls:
+            i = next_call[0] = next_call[0] + 1
+            if before_call:
+                before_call()
+            start = time.perf_counter()
+            try:
+                if is_error(await call(args_for(warmup + i - 1))):
+                    errors.append(i)
+            except Exception:
+                errors.append(i)
+            latencies.append(time.perf_counter() - start)
+
+    with RSSSampler(pid) as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        'calls': len(latencies),
+        'errors': len(errors),
+        'calls_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'peak_rss_mb': round(sampler.peak / 2 ** 20, 1) if sampler.peak else None
+    }
+
+
+def print_row(tool: str, row: dict):
+    rss = f"{row['peak_rss_mb']:.1f}" if row['peak_rss_mb'] is not None else "-"
+    print(f"{tool:<26} {row['calls']:>6} {row['errors']:>6} {row['calls_per_second']:>9.1f} "
+          f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {rss:>8}")
+
+
+def print_header(title: str):
+    print(f"\n{title}")
+    print(f"{'tool':<26} {'calls':>6} {'errors':>6} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'RSS MB':>8}")
+
+
+async def run_direct(cases, args) -> dict:
+    import mcp_server
+    from tools import config, http_client, nasa_api, thumbnails
+
+    server = mcp_server.build_server()
+    tools = await server.get_tools()
+    templates = await server.get_resource_templates()
+
+    def clear_caches():
+        for cache in nasa_api.CACHES:
+            cache.clear()
+        thumbnails.get_blob_cache().clear()
+        shutil.rmtree(config.DOWNLOAD_DIR, ignore_errors=True)
+
+    print_header("direct (tool functions in-process)")
+    results = {}
+    for name, args_for in cases:
+        fn = templates[name].fn if name.startswith(RESOURCE_PREFIX) else tools[name].fn
+        results[name] = await bench_tool(
+            lambda arguments, fn=fn: fn(**arguments), args_for, args.calls, args.concurrency, os.getpid(),
+            args.warmup, before_call=clear_caches if args.cold else None
+        )
+        print_row(name, results[name])
+    await http_client.aclose()
+    return results
+
+
+async def run_mcp(cases, args, url: str, pid: int) -> dict:
+    from fastmcp import Client
+
+    print_header(f"mcp (client session over {url})")
+    results = {}
+    async with Client(url, timeout=120) as client:
+        for name, args_for in cases:
+            if name.startswith(RESOURCE_PREFIX):
+                call = lambda arguments, name=name: client.read_resource(name.format(**arguments))
+            else:
+                call = lambda arguments, name=name: client.call_tool(name, arguments, raise_on_error=False)
+            results[name] = await bench_tool(call, args_for, args.calls, args.concurrency, pid, args.warmup)
+            print_row(name, results[name])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("direct", "mcp", "both"), default="both")
+    parser.add_argument("--tools", nargs="+", help="Only these tools (default: all)")
+    parser.add_argument("--calls", type=int, default=50, help="Measured calls per tool")
+    parser.add_argument("--warmup", type=int, default=0, help="Unmeasured calls per tool first")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--cold", action="store_true", help="Clear the caches before every direct call")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub upstream response time")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub responses that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="Fixtures directory (default benchmarks/fixtures)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    stub_kwargs = {'fixtures_dir': args.fixtures} if args.fixtures else {}
+    server, base_url = start_stub(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                                  error_status=args.error_status, seed=args.seed, **stub_kwargs)
+    cases = tool_cases(server.RequestHandlerClass.fixtures)
+    if args.tools:
+        unknown = set(args.tools) - {name for name, _ in cases}
+        if unknown:
+            parser.error(f"unknown tools: {', '.join(sorted(unknown))}")
+        cases = [case for case in cases if case[0] in args.tools]
+
+    # Settings shared by the in-process tools and the server subprocess (read when tools.config is imported)
+    workdir = tempfile.mkdtemp(prefix="nasa-mcp-bench-")
+    os.environ.update(
+        NASA_MCP_API_BASE=base_url,
+        NASA_MCP_RATE_LIMIT_RPS="0",
+        NASA_MCP_MAX_IN_FLIGHT="0",
+        NASA_MCP_CACHE_BACKEND="memory",
+        NASA_MCP_INDEX_PATH=os.path.join(workdir, "index.sqlite3"),
+        NASA_MCP_BLOB_CACHE_DIR=os.path.join(workdir, "blobs"),
+        NASA_MCP_DOWNLOAD_DIR=os.path.join(workdir, "downloads"),
+        NASA_MCP_METRICS_FILE=""
+    )
+    print(f"{len(cases)} tools x {args.calls} calls, concurrency {args.concurrency}, stub {base_url} "
+          f"latency {args.latency_ms:g}+{args.jitter_ms:g} ms, error rate {args.error_rate:g}, seed {args.seed}")
+
+    results = {}
+    if args.mode in ("direct", "both"):
+        results['direct'] = asyncio.run(run_direct(cases, args))
+    if args.mode in ("mcp", "both"):
+        process, url = start_server("http", base_url)
+        try:
+            results['mcp'] = asyncio.run(run_mcp(cases, args, url, process.pid))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+MCP transport load test
+Starts mcp_server.py with --transport http (or sse) against the fixture stub
+of the NASA API (benchmarks/nasa_stub.py) and measures tool-call throughput and latency with 1, 10 and
+100 concurrent client sessions sharing that one server process.
+
+Every session opens its own MCP connection first; then all of them call the
+tool in a loop for the same --duration seconds window. After the first call the server answers from its warm
+cache, so the numbers show per-call server + transport overhead; raise
+--latency-ms and use distinct --queries to include upstream time.
+
+Usage:
+    python benchmarks/bench_transport.py
+    python benchmarks/bench_transport.py --sessions 1 10 100 --duration 10 --transport sse
+    python benchmarks/bench_transport.py --url http://127.0.0.1:8000/mcp   # an already running server
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nasa_stub import start_stub
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(transport: str, api_base: str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        NASA_MCP_API_BASE=api_base,
+        # Measure the transport, not the upstream rate limiter
+        NASA_MCP_RATE_LIMIT_RPS="0",
+        NASA_MCP_MAX_IN_FLIGHT="0"
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "mcp_server.py"), "--transport", transport, "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        process.kill()
+        raise RuntimeError("server did not start")
+    return process, f"http://127.0.0.1:{port}/{'mcp' if transport == 'http' else 'sse'}"
+
+
+async def session(url: str, tool: str, args_for, ready: list, go: asyncio.Event, stop: list,
+                  latencies: list, errors: list):
+    from fastmcp import Client
+
+    async with Client(url, timeout=60) as client:
+        ready.append(client)
+        await go.wait()
+        i = 0
+        while time.perf_counter() < stop[0]:
+            start = time.perf_counter()
+            try:
+                await client.call_tool(tool, args_for(i))
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(str(e))
+            i += 1
+
+
+def percentile(values: list, q: float) -> float:
+    """q-quantile of latencies in seconds, returned in milliseconds."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def run_level(url: str, sessions: int, tool: str, args_for, duration: float):
+    """Open every session first, then let them all call the tool for the same measured window."""
+    latencies, errors, ready, stop = [], [], [], [0.0]
+    go = asyncio.Event()
+    workers = [
+        asyncio.create_task(session(url, tool, args_for, ready, go, stop, latencies, errors))
+        for _ in range(sessions)
+    ]
+    while len(ready) < sessions and not any(w.done() for w in workers):
+        await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    stop[0] = start + duration
+    go.set()
+    await asyncio.gather(*workers)
+    elapsed = time.perf_counter() - start
+    print(f"{sessions:>8} {len(latencies):>8} {len(latencies) / elapsed:>10.1f} "
+          f"{percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+          f"{percentile(latencies, 0.99):>8.1f} {len(errors):>7}")
+    if errors:
+        print(f"         first error: {errors[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per concurrency level")
+    parser.add_argument("--transport", choices=("http", "sse"), default="http")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub upstream response time")
+    parser.add_argument("--queries", type=int, default=20, help="Distinct search queries to rotate through")
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one")
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if not url:
+        process, url = start_server(args.transport, start_stub(latency_ms=args.latency_ms)[1])
+    queries = [f"query{n}" for n in range(args.queries)]
+
+    def args_for(i):
+        return {"query": queries[i % len(queries)], "page_size": 10}
+
+    print(f"search_nasa_images over {url}, {args.duration:g}s per level, "
+          f"{len(queries)} queries, stub latency {args.latency_ms:g} ms\n")
+    print(f"{'sessions':>8} {'calls':>8} {'calls/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    try:
+        for sessions in args.sessions:
+            asyncio.run(run_level(url, sessions, "search_nasa_images", args_for, args.duration))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+NASA API fixture stub
+A local stand-in for images-api.nasa.gov and images-assets.nasa.gov that
+replays recorded responses from benchmarks/fixtures/, so benchmarks and load
+tests run offline with repeatable numbers.
+
+Fixture layout (paths as on NASA's hosts):
+    search/<query-slug>.json        /search response for a query
+    asset/<nasa_id>.json            /asset manifest
+    metadata/<nasa_id>.json         /metadata location pointer
+    captions/<nasa_id>.json         /captions location pointer
+    files/<path>                    images-assets.nasa.gov/<path> (metadata.json, .srt)
+
+NASA URLs inside the fixtures are rewritten to point at the stub. /search
+replays the fixture whose query shares the most words with the request
+(the first one if none does), filtered by media_type and year range and
+sliced by page / page_size. Media files under files/ that were not recorded
+(thumbnails, originals) are served as deterministic filler bytes. Responses
+carry an ETag and honour If-None-Match and single Range requests (with
+If-Range) like NASA's CDN.
+
+The committed fixtures are a small seed set in the API's response format;
+`record` replaces or extends them with live responses.
+
+Usage:
+    python benchmarks/nasa_stub.py serve --port 9000 --latency-ms 80 --error-rate 0.02
+    NASA_MCP_API_BASE=http://127.0.0.1:9000 python mcp_server.py
+    python benchmarks/nasa_stub.py record --query "apollo 11" --pages 2 --details 10
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+API_HOST = "https://images-api.nasa.gov"
+ASSETS_HOST = "images-assets.nasa.gov"
+
+# Filler size for unrecorded media files, by NASA's rendition suffix
+FILLER_BYTES = {
+    '~thumb': 8 * 1024,
+    '~small': 48 * 1024,
+    '~medium': 192 * 1024,
+    '~large': 768 * 1024,
+    '~orig': 4 * 1024 * 1024,
+    '~preview': 1024 * 1024
+}
+CONTENT_TYPES = {
+    '.json': 'application/json',
+    '.srt': 'application/x-subrip',
+    '.vtt': 'text/vtt',
+    '.jpg': 'image/jpeg',
+    '.png': 'image/png',
+    '.tif': 'image/tiff',
+    '.mp4': 'video/mp4'
+}
+
+
+def slugify(query: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "all"
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class Fixtures:
+    """Recorded responses loaded from a fixtures directory."""
+
+    def __init__(self, root: str = FIXTURES):
+        self.root = root
+        self.searches = {}
+        search_dir = os.path.join(root, "search")
+        for name in sorted(os.listdir(search_dir)) if os.path.isdir(search_dir) else []:
+            if name.endswith(".json"):
+                with open(os.path.join(search_dir, name), "r", encoding="utf-8") as f:
+                    self.searches[name[:-5]] = json.load(f)
+
+    def ids(self, endpoint: str) -> list:
+        """nasa_ids with a recorded response for an endpoint (asset, metadata, captions)."""
+        directory = os.path.join(self.root, endpoint)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(unquote(name[:-5]) for name in os.listdir(directory) if name.endswith(".json"))
+
+    def media_types(self) -> dict:
+        """nasa_id -> media_type for every item in the search fixtures."""
+        types = {}
+        for doc in self.searches.values():
+            for item in doc['collection']['items']:
+                data = item['data'][0]
+                types[data['nasa_id']] = data.get('media_type')
+        return types
+
+    def search(self, params: dict) -> dict:
+        query = params.get('q', '')
+        wanted = _words(query)
+        slug = max(self.searches, key=lambda s: len(wanted & _words(s.replace("-", " "))), default=None)
+        if slug is None:
+            items = []
+        else:
+            items = self.searches[slug]['collection']['items']
+
+        media_types = [t for t in params.get('media_type', '').split(',') if t]
+        year_start = params.get('year_start', '')
+        year_end = params.get('year_end', '')
+        matched = []
+        for item in items:
+            data = item['data'][0]
+            year = (data.get('date_created') or '')[:4]
+            if media_types and data.get('media_type') not in media_types:
+                continue
+            if year_start and year < year_start or year_end and year > year_end:
+                continue
+            matched.append(item)
+
+        page = max(int(params.get('page', 1) or 1), 1)
+        page_size = max(int(params.get('page_size', 100) or 100), 1)
+        start = (page - 1) * page_size
+        return {'collection': {
+            'version': '1.0',
+            'href': f"{API_HOST}/search",
+            'items': matched[start:start + page_size],
+            'metadata': {'total_hits': len(matched)},
+            'links': []
+        }}
+
+    def read(self, *parts):
+        path = os.path.join(self.root, *parts)
+        if not os.path.abspath(path).startswith(os.path.abspath(self.root) + os.sep) or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def filler(path: str) -> bytes:
+    """Deterministic bytes standing in for a media file that was not recorded."""
+    size = next((n for suffix, n in FILLER_BYTES.items() if suffix in path), 64 * 1024)
+    block = hashlib.sha256(path.encode()).digest() * 128
+    return (block * (size // len(block) + 1))[:size]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # Set by start_stub()
+    fixtures = None
+    base_url = ""
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    error_status = 503
+    rng = random.Random(0)
+    rng_lock = threading.Lock()
+    requests_served = 0
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head: bool = False):
+        with self.rng_lock:
+            StubHandler.requests_served += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            fail = self.error_rate > 0 and self.rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return self._send(self.error_status, b'{"reason": "injected error"}', "application/json", head)
+
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = unquote(url.path)
+        if path == "/search":
+            body = json.dumps(self.fixtures.search(params)).encode()
+            return self._send(200, self._rewrite(body), "application/json", head)
+
+        match = re.match(r"^/(asset|metadata|captions)/(.+)$", path)
+        if match:
+            body = self.fixtures.read(match.group(1), f"{match.group(2)}.json")
+            if body is None:
+                return self._send(404, b'{"reason": "Not found"}', "application/json", head)
+            return self._send(200, self._rewrite(body), "application/json", head)
+
+        if path.startswith("/files/"):
+            relative = path[len("/files/"):]
+            body = self.fixtures.read("files", *relative.split("/"))
+            extension = os.path.splitext(relative)[1].lower()
+            if body is None:
+                if extension in (".json", ".srt", ".vtt"):
+                    return self._send(404, b"Not found", "text/plain", head)
+                body = filler(relative)
+            else:
+                body = self._rewrite(body)
+            return self._send(200, body, CONTENT_TYPES.get(extension, "application/octet-stream"), head)
+
+        return self._send(404, b'{"reason": "Not found"}', "application/json", head)
+
+    def _rewrite(self, body: bytes) -> bytes:
+        """Point recorded NASA URLs at this stub."""
+        body = body.replace(API_HOST.encode(), self.base_url.encode())
+        for scheme in (b"https://", b"http://"):
+            body = body.replace(scheme + ASSETS_HOST.encode(), f"{self.base_url}/files".encode())
+        return body
+
+    def _send(self, status: int, body: bytes, content_type: str, head: bool = False):
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content_range = None
+        match = re.match(r"^bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        if status == 200 and match and self.headers.get("If-Range", etag) == etag:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(body) - 1), len(body) - 1)
+            if start > end:
+                status, body, content_range = 416, b"", f"bytes */{len(body)}"
+            else:
+                status, body, content_range = 206, body[start:end + 1], f"bytes {start}-{end}/{len(body)}"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status in (200, 206):
+            self.send_header("ETag", etag)
+            self.send_header("Accept-Ranges", "bytes")
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.end_headers()
+        if not head:
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client hung up, e.g. a cancelled download or an If-Range mismatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(
+    port: int = 0,
+    fixtures_dir: str = FIXTURES,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed: int = 0
+):
+    """
+    Serve the fixtures on 127.0.0.1 from a background thread.
+
+    Every request waits latency_ms plus uniform(0, jitter_ms) and fails with
+    error_status at error_rate; the random draws come from one generator
+    seeded with seed, so a run's sequence of delays and failures repeats.
+
+    Returns:
+        (server, base_url) - pass base_url as NASA_MCP_API_BASE
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    StubHandler.fixtures = Fixtures(fixtures_dir)
+    StubHandler.base_url = base_url
+    StubHandler.latency = latency_ms / 1000.0
+    StubHandler.jitter = jitter_ms / 1000.0
+    StubHandler.error_rate = error_rate
+    StubHandler.error_status = error_status
+    StubHandler.rng = random.Random(seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+def record(queries: list, pages: int, details: int, nasa_ids: list, fixtures_dir: str = FIXTURES):
+    """Fetch live responses from NASA and store them as fixtures."""
+    import requests
+
+    session = requests.Session()
+
+    def fetch(url, params=None):
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        return response
+
+    def save(relative, content: bytes):
+        path = os.path.join(fixtures_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        print(f"  {relative} ({len(content):,} bytes)", file=sys.stderr)
+
+    def save_file(url):
+        parts = urlsplit(url)
+        if parts.netloc == ASSETS_HOST:
+            save(os.path.join("files", *unquote(parts.path).lstrip("/").split("/")), fetch(url).content)
+
+    wanted = list(nasa_ids)
+    for query in queries:
+        items = []
+        for page in range(1, pages + 1):
+            doc = fetch(f"{API_HOST}/search", {'q': query, 'page': page, 'page_size': 100}).json()
+            items.extend(doc['collection']['items'])
+            if len(doc['collection']['items']) < 100:
+                break
+        doc['collection']['items'] = items
+        save(os.path.join("search", f"{slugify(query)}.json"), json.dumps(doc, ensure_ascii=False).encode())
+        wanted.extend(item['data'][0]['nasa_id'] for item in items[:details])
+
+    for nasa_id in dict.fromkeys(wanted):
+        for endpoint in ("asset", "metadata", "captions"):
+            try:
+                response = fetch(f"{API_HOST}/{endpoint}/{nasa_id}")
+            except requests.HTTPError:
+                continue  # e.g. images have no captions
+            save(os.path.join(endpoint, f"{nasa_id}.json"), response.content)
+            location = response.json().get('location')
+            if location:
+                try:
+                    save_file(location)
+                except requests.HTTPError as e:
+                    print(f"  {location}: {e}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES, help="Fixtures directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve the fixtures")
+    serve.add_argument("--port", type=int, default=9000)
+    serve.add_argument("--latency-ms", type=float, default=0.0, help="Added to every response")
+    serve.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random delay")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    serve.add_argument("--error-status", type=int, default=503)
+    serve.add_argument("--seed", type=int, default=0)
+
+    rec = commands.add_parser("record", help="Record fixtures from the live NASA API")
+    rec.add_argument("--query", action="append", default=[], help="Search query (repeatable)")
+    rec.add_argument("--pages", type=int, default=1, help="/search pages of 100 per query")
+    rec.add_argument("--details", type=int, default=10,
+                     help="Record asset / metadata / captions for the first N results of each query")
+    rec.add_argument("--nasa-id", action="append", default=[], help="Extra nasa_id to record (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if not args.query and not args.nasa_id:
+            parser.error("give at least one --query or --nasa-id")
+        record(args.query, args.pages, args.details, args.nasa_id, args.fixtures)
+        return
+
+    server, base_url = start_stub(args.port, args.fixtures, args.latency_ms, args.jitter_ms,
+                                  args.error_rate, args.error_status, args.seed)
+    print(f"Serving {args.fixtures} at {base_url} (set NASA_MCP_API_BASE={base_url})", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,32 @@ through the Model Context Protocol (MCP).
 
 ALL SEARCHES ARE LIVE - Direct API calls to NASA's complete database.
 """
+import argparse
+import signal
 import sys
 from fastmcp import FastMCP
+from starlette.responses import PlainTextResponse
+
+from tools import config, metrics, tracing
 
 # Import all tool registration functions
 from tools.search_tools import register_search_tools
 from tools.metadata_tools import register_metadata_tools
 from tools.media_tools import register_media_tools
 from tools.collection_tools import register_collection_tools
+from tools.diagnostic_tools import register_diagnostic_tools
 
-def main():
-    """Initialize and start the MCP server."""
+TRANSPORTS = ("stdio", "http", "sse")
+
+
+def build_server() -> FastMCP:
+    """Create the FastMCP server with every NASA tool registered."""
     
     # Create the FastMCP server instance
     mcp = FastMCP(
         name="NASA-Image-Library",
+        tool_serializer=metrics.timed_serializer,
+        lifespan=metrics.lifespan,
         instructions="""
 You have access to tools for exploring NASA's COMPLETE public image and video library.
 
@@ -31,6 +42,10 @@ Available tool categories:
    - search_nasa_images: Search for ANYTHING (Mars, Jupiter, Hubble, etc.)
      * Use for: Mars, planets, missions, celestial objects, phenomena
      * Searches NASA's ENTIRE database (millions of items)
+     * mode="prefer_local" answers from the harvested local index (fast)
+   
+   - search_nasa_images_all: Same search, collected across MANY pages
+     * Use for: "all"/"every" result requests, more than 100 results
    
    - search_apollo11_specific: Quick Apollo 11 image search
      * Use for: Quick Apollo 11 photo searches with keywords
@@ -46,10 +61,28 @@ Available tool categories:
 
 3. Metadata Tools - Get detailed information
    - get_image_details: All available file versions and URLs
+   - get_image_details_many: File versions for MANY NASA IDs in one call
+     * Use when: You need details for several search results at once
    - get_metadata: Technical metadata (EXIF, camera info)
+     * include_files=True also returns all file versions in the same call
+     * profile="camera"/"location"/"summary"/"exif" or keys=["EXIF:*"] for small responses
+   - get_item: Metadata + files (+ captions for videos) in ONE parallel call
+     * Use when: User wants everything about one item
 
 4. Media Tools - Access video features
-   - get_captions: Download video subtitles (SRT format)
+   - get_captions: Caption overview (cue count, duration, first cues)
+   - get_caption_cues: Caption cues by time window, cue range or text search
+     * Use when: "What is said at 12:30?", "When do they mention X?"
+   - search_captions: Which videos mention a phrase (local caption index, no downloads)
+     * Use when: "Which Apollo videos mention 'Tranquility Base'?"
+   - get_thumbnail: A result's preview image from the local cache (path or bytes)
+     * Also readable as the resource nasa://thumbnail/{nasa_id}
+   - download_asset: Save an original-resolution file to disk (parallel, resumable)
+
+5. Diagnostic Tools - Server health
+   - get_cache_stats: Cache hit ratios and deduplicated upstream calls
+   - get_metrics: Per-tool latency percentiles, errors and upstream timing
+   - get_trace: Timeline of recent tool calls, their upstream requests and cache hits
 
 Data source: https://images.nasa.gov
 API endpoint: https://images-api.nasa.gov
@@ -59,6 +92,9 @@ API endpoint: https://images-api.nasa.gov
 - "Apollo 11 archives?" → get_apollo11_resources
 - "Famous NASA images?" → get_famous_nasa_images
 - "Get details for [nasa_id]" → get_image_details
+- "Get details for these 20 results" → get_image_details_many
+- "Tell me everything about [nasa_id]" → get_item
+- "Which videos mention [phrase]?" → search_captions
 
 All searches return LIVE results from NASA's complete database!
         """
@@ -78,14 +114,53 @@ All searches return LIVE results from NASA's complete database!
     print("  - Collection tools (LIVE NASA API)", file=sys.stderr)
     register_collection_tools(mcp)
     
-    # Start the server
+    print("  - Diagnostic tools (cache statistics)", file=sys.stderr)
+    register_diagnostic_tools(mcp)
+    
+    # Trace, count and time every tool call (see tools/tracing.py, tools/metrics.py)
+    mcp.add_middleware(tracing.TracingMiddleware())
+    mcp.add_middleware(metrics.ToolMetricsMiddleware())
+    if config.METRICS_PATH:
+        @mcp.custom_route(config.METRICS_PATH, methods=["GET"], include_in_schema=False)
+        async def metrics_endpoint(request):
+            return PlainTextResponse(metrics.render_openmetrics(), media_type=metrics.CONTENT_TYPE)
+    
     print("\n[OK] All tools registered successfully!", file=sys.stderr)
+    return mcp
+
+
+def main(argv=None):
+    """Initialize and start the MCP server."""
+    parser = argparse.ArgumentParser(description="NASA Image Library MCP server")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=config.TRANSPORT,
+                        help="stdio (one client per process) or http / sse (many clients, shared caches)")
+    parser.add_argument("--host", default=config.HOST, help="Bind address for http / sse")
+    parser.add_argument("--port", type=int, default=config.PORT, help="Port for http / sse")
+    parser.add_argument("--path", default=config.HTTP_PATH or None,
+                        help="Endpoint path for http / sse (default: /mcp, /sse)")
+    args = parser.parse_args(argv)
+    if args.transport not in TRANSPORTS:
+        parser.error(f"unknown transport {args.transport!r} (valid: {', '.join(TRANSPORTS)})")
+
+    mcp = build_server()
+    # Unwind normally on SIGTERM (docker stop, systemd) so shutdown hooks like the final metrics dump run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # Start the server
     print("All searches are LIVE - querying NASA's complete database", file=sys.stderr)
     print("Starting NASA MCP Server...", file=sys.stderr)
-    print("Listening for connections on stdio transport...", file=sys.stderr)
     
     try:
-        mcp.run(transport="stdio")
+        if args.transport == "stdio":
+            print("Listening for connections on stdio transport...", file=sys.stderr)
+            mcp.run(transport="stdio")
+        else:
+            path = args.path or ("/mcp" if args.transport == "http" else "/sse")
+            print(f"Listening for connections on {args.transport} transport at "
+                  f"http://{args.host}:{args.port}{path}...", file=sys.stderr)
+            if config.METRICS_PATH:
+                print(f"OpenMetrics at http://{args.host}:{args.port}{config.METRICS_PATH}", file=sys.stderr)
+            mcp.run(transport=args.transport, host=args.host, port=args.port, path=args.path)
     except KeyboardInterrupt:
         print("\n\nServer stopped by user.", file=sys.stderr)
     except Exception as e:
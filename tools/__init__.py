@@ -5,10 +5,12 @@ from .search_tools import register_search_tools
 from .metadata_tools import register_metadata_tools
 from .media_tools import register_media_tools
 from .collection_tools import register_collection_tools
+from .diagnostic_tools import register_diagnostic_tools
 
 __all__ = [
     'register_search_tools',
     'register_metadata_tools',
     'register_media_tools',
-    'register_collection_tools'
+    'register_collection_tools',
+    'register_diagnostic_tools'
 ]
\ No newline at end of file
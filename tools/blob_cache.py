@@ -0,0 +1,205 @@
+"""
+NASA Blob Cache
+Content-addressed on-disk cache for binary assets (thumbnails and other
+previews) fetched from the NASA asset CDN.
+
+Each blob is stored once under its SHA-256 digest (blobs/ab/abcdef...),
+however many URLs point at it; a SQLite index (WAL mode, shareable by
+several server processes) maps URLs to digests and keeps sizes, content
+types and access times. When the blobs outgrow max_bytes the least
+recently used ones are deleted together with the URLs that referenced them.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .cache import SQLiteStore
+
+
+class BlobCache:
+    """URL -> content-addressed file cache with a size cap and LRU eviction."""
+
+    ACCESS_RESOLUTION = SQLiteStore.ACCESS_RESOLUTION
+
+    def __init__(self, root: str, max_bytes: int, name: str = "blobs"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(root, "index.sqlite3"), timeout=10.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs(last_access);
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_urls_digest ON urls(digest);
+        """)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _entry(self, url: str, row) -> dict:
+        digest, size, content_type = row
+        return {
+            'url': url,
+            'sha256': digest,
+            'size': size,
+            'content_type': content_type,
+            'path': self.blob_path(digest)
+        }
+
+    def get(self, url: str):
+        """
+        Return {'url', 'sha256', 'size', 'content_type', 'path'} for a cached URL, or None.
+
+        A row whose file has gone missing (deleted by hand) counts as a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT b.digest, b.size, b.content_type, b.last_access FROM urls u "
+                "JOIN blobs b ON b.digest = u.digest WHERE u.url = ?",
+                (url,)
+            ).fetchone()
+            if row is not None and not os.path.exists(self.blob_path(row[0])):
+                self._conn.execute("DELETE FROM urls WHERE digest = ?", (row[0],))
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (row[0],))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if now - row[3] > self.ACCESS_RESOLUTION:
+                self._conn.execute("UPDATE blobs SET last_access = ? WHERE digest = ?", (now, row[0]))
+        return self._entry(url, row[:3])
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def read(self, url: str):
+        """Cached bytes of url, or None."""
+        entry = self.get(url)
+        if entry is None:
+            return None
+        try:
+            with open(entry['path'], 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, url: str, data: bytes, content_type: str = None) -> dict:
+        """Store data for url (deduplicated by content) and evict LRU blobs beyond max_bytes."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO blobs (digest, size, content_type, created_at, last_access) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(digest) DO UPDATE SET last_access = excluded.last_access",
+                    (digest, len(data), content_type, now, now)
+                )
+                self._conn.execute(
+                    "INSERT INTO urls (url, digest) VALUES (?, ?) ON CONFLICT(url) DO UPDATE SET digest = excluded.digest",
+                    (url, digest)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.evict(keep=digest)
+        return self._entry(url, (digest, len(data), content_type))
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self, keep: str = None):
+        """Delete least recently used blobs (and their URLs) until under max_bytes; never the blob `keep`."""
+        victims = []
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            for digest, size in self._conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall():
+                if excess <= 0:
+                    break
+                if digest == keep:
+                    continue
+                victims.append(digest)
+                excess -= size
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for digest in victims:
+                    self._conn.execute("DELETE FROM urls WHERE digest = ?", (digest,))
+                    self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for digest in victims:
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+        self.evictions += len(victims)
+
+    def clear(self):
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute("SELECT digest FROM blobs")]
+            self._conn.execute("DELETE FROM urls")
+            self._conn.execute("DELETE FROM blobs")
+        for digest in digests:
+            try:
+                os.remove(self.blob_path(digest))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            blobs, stored = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'backend': 'disk',
+            'path': self.root,
+            'entries': urls,
+            'blobs': blobs,
+            'bytes': stored,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
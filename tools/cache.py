@@ -0,0 +1,428 @@
+"""
+NASA Response Cache
+In-process TTL + LRU cache for NASA API responses, with an optional
+on-disk tier for long-lived manifests and a SQLite backend that several
+server processes on one machine can share.
+
+Use make_cache() to get a cache for the configured backend
+(NASA_MCP_CACHE_BACKEND = "memory" or "sqlite").
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from . import config
+
+
+class CacheEntry:
+    """A cached value plus the HTTP validators needed to revalidate it."""
+
+    __slots__ = ('value', 'expires_at', 'size', 'etag', 'last_modified')
+
+    def __init__(self, value, expires_at: float, size: int = 0, etag: str = None, last_modified: str = None):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TTLCache:
+    """
+    Thread-safe cache with per-entry expiry and LRU eviction.
+
+    Entries are evicted least-recently-used first whenever the entry count
+    exceeds max_entries or the summed entry sizes exceed max_bytes.
+    Expired entries are kept (until evicted) so they can be revalidated
+    with a conditional GET via get_entry().
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int = 1024, max_bytes: int = 0):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> CacheEntry
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.stale_served = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        entry = self.get_entry(key)
+        if entry is None or not entry.fresh:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.value
+
+    def get_entry(self, key):
+        """Return the CacheEntry for key even if expired (no hit/miss accounting)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, size: int = 0, ttl: float = None, etag: str = None, last_modified: str = None):
+        """
+        Store a value.
+
+        Args:
+            key: Hashable cache key
+            value: Value to cache (treated as read-only by callers)
+            size: Approximate size in bytes, used for the max_bytes budget
+            ttl: Optional per-entry TTL override (seconds)
+            etag: Optional ETag response header for later revalidation
+            last_modified: Optional Last-Modified response header for later revalidation
+        """
+        if self.max_bytes and size > self.max_bytes:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._store(key, CacheEntry(value, expires_at, size, etag, last_modified))
+
+    def refresh(self, key, ttl: float = None):
+        """Extend an entry's lifetime after a successful revalidation (304)."""
+        entry = self.get_entry(key)
+        if entry is not None:
+            entry.expires_at = time.time() + (self.ttl if ttl is None else ttl)
+            self.revalidations += 1
+            self._persist(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'revalidations': self.revalidations,
+                'stale_served': self.stale_served,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _store(self, key, entry: CacheEntry, persist: bool = True):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            evicted = self._evict()
+        for old_key in evicted:
+            self._discard(old_key)
+        if persist:
+            self._persist(key, entry)
+
+    def _evict(self) -> list:
+        evicted = []
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+    # Hooks for persistent subclasses
+    def _persist(self, key, entry: CacheEntry):
+        pass
+
+    def _discard(self, key):
+        pass
+
+
+class PersistentTTLCache(TTLCache):
+    """
+    TTLCache that mirrors every entry to a JSON file in `directory`.
+
+    Entries survive restarts: an in-memory miss falls back to the file,
+    which is then promoted back into memory. Keys must be JSON-serializable.
+    """
+
+    def __init__(self, name: str, directory: str, ttl: float, max_entries: int = 1024, max_bytes: int = 0):
+        super().__init__(name, ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self.directory = os.path.join(directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_entry(self, key):
+        entry = super().get_entry(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is not None:
+                self._store(key, entry, persist=False)
+        return entry
+
+    def clear(self):
+        super().clear()
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(self.directory, filename))
+
+    def _path(self, key) -> str:
+        digest = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return CacheEntry(**json.load(f)['entry'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _persist(self, key, entry: CacheEntry):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'entry': entry.to_dict()}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError):
+            pass
+
+    def _discard(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class SQLiteStore:
+    """
+    One SQLite database file (WAL mode) holding every cache namespace.
+
+    Several server processes can open the same file concurrently. Values are
+    stored as zlib-compressed JSON, and a background thread keeps the total
+    compressed size under max_bytes by dropping long-expired entries first
+    and then the least recently accessed ones.
+    """
+
+    # Only bump last_access when it is older than this, so hot reads don't
+    # turn into a write on every lookup
+    ACCESS_RESOLUTION = 60.0
+
+    def __init__(self, path: str, max_bytes: int, evict_interval: float = 60.0, stale_grace: float = 86400.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.stale_grace = stale_grace
+        self.evictions = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access)")
+
+        self._evictor = threading.Thread(target=self._evict_loop, name="nasa-mcp-cache-evictor", daemon=True)
+        self._evictor.start()
+
+    def execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def total_bytes(self) -> int:
+        return self.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries")[0][0]
+
+    def evict(self):
+        """Drop long-expired entries, then LRU entries until under the size budget."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = self._conn.execute(
+                    "DELETE FROM cache_entries WHERE expires_at < ?", (now - self.stale_grace,)
+                ).rowcount
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    rows = self._conn.execute(
+                        "SELECT namespace, key, size FROM cache_entries ORDER BY last_access"
+                    )
+                    victims = []
+                    for namespace, key, size in rows:
+                        if excess <= 0:
+                            break
+                        victims.append((namespace, key))
+                        excess -= size
+                    self._conn.executemany(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims
+                    )
+                    removed += len(victims)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.evictions += removed
+
+    def _evict_loop(self):
+        while True:
+            time.sleep(self.evict_interval)
+            try:
+                self.evict()
+            except sqlite3.Error:
+                pass
+
+
+class SQLiteCache:
+    """
+    TTLCache-compatible view of one namespace in a shared SQLiteStore.
+
+    Hit/miss counters are per process; entries and the size budget are
+    shared by every process using the same database file.
+    """
+
+    def __init__(self, name: str, store: SQLiteStore, ttl: float):
+        self.name = name
+        self.store = store
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale_served = 0
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        if entry is None or not entry.fresh:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.value
+
+    def get_entry(self, key):
+        key_text = json.dumps(key)
+        rows = self.store.execute(
+            "SELECT value, size, expires_at, etag, last_modified, last_access "
+            "FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.name, key_text)
+        )
+        if not rows:
+            return None
+        blob, size, expires_at, etag, last_modified, last_access = rows[0]
+        now = time.time()
+        if last_access < now - SQLiteStore.ACCESS_RESOLUTION:
+            self.store.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.name, key_text)
+            )
+        try:
+            value = json.loads(zlib.decompress(blob))
+        except (zlib.error, ValueError):
+            return None
+        return CacheEntry(value, expires_at, size, etag, last_modified)
+
+    def set(self, key, value, size: int = 0, ttl: float = None, etag: str = None, last_modified: str = None):
+        blob = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        if len(blob) > self.store.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self.store.execute(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(namespace, key, value, size, expires_at, etag, last_modified, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.name, json.dumps(key), blob, len(blob), expires_at, etag, last_modified, now)
+        )
+
+    def refresh(self, key, ttl: float = None):
+        self.store.execute(
+            "UPDATE cache_entries SET expires_at = ? WHERE namespace = ? AND key = ?",
+            (time.time() + (self.ttl if ttl is None else ttl), self.name, json.dumps(key))
+        )
+        self.revalidations += 1
+
+    def clear(self):
+        self.store.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+
+    def stats(self) -> dict:
+        entries, stored = self.store.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.name,)
+        )[0]
+        lookups = self.hits + self.misses
+        return {
+            'name': self.name,
+            'backend': 'sqlite',
+            'entries': entries,
+            'bytes': stored,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.store.evictions,
+            'revalidations': self.revalidations,
+            'stale_served': self.stale_served,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(path: str) -> SQLiteStore:
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SQLiteStore(
+                path,
+                max_bytes=config.CACHE_DB_MAX_BYTES,
+                evict_interval=config.CACHE_DB_EVICT_INTERVAL,
+                stale_grace=config.CACHE_DB_STALE_GRACE
+            )
+        return _stores[path]
+
+
+def make_cache(name: str, ttl: float, max_entries: int = 1024, max_bytes: int = 0, persist_dir: str = ""):
+    """
+    Create a cache for the configured backend.
+
+    With NASA_MCP_CACHE_BACKEND=sqlite every cache is a namespace in the shared
+    database at NASA_MCP_CACHE_DB (max_entries / max_bytes are then replaced by
+    the database-wide NASA_MCP_CACHE_DB_MAX_BYTES budget). Otherwise an
+    in-process TTLCache is used, mirrored to persist_dir when one is given.
+    """
+    if config.CACHE_BACKEND == "sqlite":
+        return SQLiteCache(name, _get_store(config.CACHE_DB), ttl)
+    if persist_dir:
+        return PersistentTTLCache(name, persist_dir, ttl, max_entries=max_entries, max_bytes=max_bytes)
+    return TTLCache(name, ttl, max_entries=max_entries, max_bytes=max_bytes)
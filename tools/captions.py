@@ -0,0 +1,124 @@
+"""
+NASA Caption Parsing
+Parses SRT (and WebVTT-style) caption files into cues and selects cues by
+time window, cue range or text search, so caption tools can return just the
+slice that was asked for instead of the whole file.
+
+A cue is a plain dict so it can live in every cache backend:
+    {'index': 1, 'start': 1.5, 'end': 4.0, 'text': 'Houston, Tranquility Base here.'}
+with start / end in seconds.
+"""
+import re
+
+_TIMING_RE = re.compile(
+    r"(?P<start>\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}|\d{1,2}:\d{2}[,.]\d{1,3})\s*-->\s*"
+    r"(?P<end>\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}|\d{1,2}:\d{2}[,.]\d{1,3})"
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_timestamp(value) -> float:
+    """
+    Parse "HH:MM:SS,mmm", "HH:MM:SS", "MM:SS" or plain seconds into seconds.
+
+    Raises:
+        ValueError: If the value is not a recognizable time
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(',', '.')
+    if not text:
+        raise ValueError("Empty time value")
+    parts = text.split(':')
+    if len(parts) > 3:
+        raise ValueError(f"Invalid time value: {value!r}")
+    seconds = 0.0
+    try:
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Invalid time value: {value!r} (use HH:MM:SS, MM:SS or seconds)") from None
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as an SRT timestamp (HH:MM:SS,mmm)."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def parse_srt(text: str) -> list:
+    """
+    Parse SRT content into a list of cues ordered as in the file.
+
+    Tolerates a BOM, CRLF line endings, a WEBVTT header, missing cue
+    numbers and '.' as the millisecond separator. Blocks without a timing
+    line are skipped; formatting tags like <i> are stripped from the text.
+    """
+    cues = []
+    blocks = re.split(r"\n\s*\n", text.lstrip('﻿').replace('\r\n', '\n').replace('\r', '\n'))
+    for block in blocks:
+        lines = [line for line in block.strip().split('\n') if line.strip()]
+        for i, line in enumerate(lines):
+            match = _TIMING_RE.search(line)
+            if match:
+                break
+        else:
+            continue
+        cue_text = " ".join(_TAG_RE.sub("", l).strip() for l in lines[i + 1:]).strip()
+        cues.append({
+            'index': len(cues) + 1,
+            'start': parse_timestamp(match.group('start')),
+            'end': parse_timestamp(match.group('end')),
+            'text': cue_text
+        })
+    return cues
+
+
+def format_cue(cue: dict) -> dict:
+    """Cue as returned by the tools, with SRT-style timestamps."""
+    return {
+        'index': cue['index'],
+        'start': format_timestamp(cue['start']),
+        'end': format_timestamp(cue['end']),
+        'text': cue['text']
+    }
+
+
+def select_cues(
+    cues: list,
+    start_time=None,
+    end_time=None,
+    cue_start: int = None,
+    cue_end: int = None,
+    query: str = ""
+) -> list:
+    """
+    Filter cues by time window (overlap), 1-based inclusive cue range and text.
+
+    The query matches cues containing every word of it, case-insensitively.
+    """
+    start = parse_timestamp(start_time) if start_time not in (None, "") else None
+    end = parse_timestamp(end_time) if end_time not in (None, "") else None
+    words = _WORD_RE.findall(query.lower()) if query else []
+
+    selected = []
+    for cue in cues:
+        if cue_start is not None and cue['index'] < cue_start:
+            continue
+        if cue_end is not None and cue['index'] > cue_end:
+            break
+        if start is not None and cue['end'] <= start:
+            continue
+        if end is not None and cue['start'] >= end:
+            break
+        if words:
+            cue_words = set(_WORD_RE.findall(cue['text'].lower()))
+            if not all(word in cue_words for word in words):
+                continue
+        selected.append(cue)
+    return selected
@@ -0,0 +1,147 @@
+"""
+NASA MCP Configuration
+Runtime settings shared by all tool modules (overridable via environment variables)
+"""
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name, "")
+    return int(value) if value.strip() else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name, "")
+    return float(value) if value.strip() else default
+
+
+# NASA API endpoints
+API_BASE = os.environ.get("NASA_MCP_API_BASE", "https://images-api.nasa.gov").rstrip("/")
+
+# MCP transport (mcp_server.py; overridable with --transport / --host / --port / --path).
+# "stdio" serves one client per process; "http" (streamable HTTP) and "sse" let one
+# long-lived process with warm caches and pooled connections serve many clients.
+TRANSPORT = os.environ.get("NASA_MCP_TRANSPORT", "stdio").strip().lower()
+HOST = os.environ.get("NASA_MCP_HOST", "127.0.0.1")
+PORT = _env_int("NASA_MCP_PORT", 8000)
+HTTP_PATH = os.environ.get("NASA_MCP_HTTP_PATH", "")
+
+# HTTP connection pool
+# Pools are kept per host (API + asset CDN), so POOL_HOSTS is the number of
+# distinct hosts we keep warm and POOL_MAXSIZE is the keep-alive connections per host.
+POOL_HOSTS = _env_int("NASA_MCP_POOL_HOSTS", 4)
+POOL_MAXSIZE = _env_int("NASA_MCP_POOL_MAXSIZE", 16)
+
+# Timeouts in seconds: (connect, read)
+CONNECT_TIMEOUT = _env_float("NASA_MCP_CONNECT_TIMEOUT", 5.0)
+READ_TIMEOUT = _env_float("NASA_MCP_READ_TIMEOUT", 15.0)
+
+USER_AGENT = os.environ.get("NASA_MCP_USER_AGENT", "NASA-MCP/1.0")
+
+# Retries and circuit breaker (tools/resilience.py)
+# Transient failures (connection errors, timeouts, 429, 5xx) are retried up to
+# RETRY_ATTEMPTS times in total with full-jitter exponential backoff, all within
+# REQUEST_DEADLINE seconds. BREAKER_FAILURE_THRESHOLD consecutive failures open
+# a host's breaker for BREAKER_RESET seconds; meanwhile stale cache entries are served.
+RETRY_ATTEMPTS = _env_int("NASA_MCP_RETRY_ATTEMPTS", 3)
+RETRY_BACKOFF_BASE = _env_float("NASA_MCP_RETRY_BACKOFF_BASE", 0.25)
+RETRY_BACKOFF_MAX = _env_float("NASA_MCP_RETRY_BACKOFF_MAX", 4.0)
+REQUEST_DEADLINE = _env_float("NASA_MCP_REQUEST_DEADLINE", 30.0)
+BREAKER_FAILURE_THRESHOLD = _env_int("NASA_MCP_BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET = _env_float("NASA_MCP_BREAKER_RESET", 30.0)
+
+# Metrics (tools/metrics.py). Over http / sse, OpenMetrics text is served at
+# METRICS_PATH ("" disables the route). With METRICS_FILE set, the same text is
+# rewritten there at most every METRICS_DUMP_INTERVAL seconds and on shutdown.
+METRICS_PATH = os.environ.get("NASA_MCP_METRICS_PATH", "/metrics")
+METRICS_FILE = os.environ.get("NASA_MCP_METRICS_FILE", "")
+METRICS_DUMP_INTERVAL = _env_float("NASA_MCP_METRICS_DUMP_INTERVAL", 15.0)
+
+# Tracing (tools/tracing.py): spans per tool call and upstream request, kept in a
+# ring buffer of TRACE_BUFFER spans for get_trace. Enabled by TRACING=1 or by
+# setting TRACE_FILE, which also appends every span to that JSONL file.
+TRACING = _env_int("NASA_MCP_TRACING", 0)
+TRACE_FILE = os.environ.get("NASA_MCP_TRACE_FILE", "")
+TRACE_BUFFER = _env_int("NASA_MCP_TRACE_BUFFER", 2048)
+
+# Upstream rate limiting (tools/rate_limit.py), shared by every tool in the process.
+# A token bucket allows RATE_LIMIT_RPS requests per second with bursts of
+# RATE_LIMIT_BURST, and at most MAX_IN_FLIGHT requests run at once (0 disables
+# either). Interactive tools are granted before bulk pagination / batch / harvests.
+RATE_LIMIT_RPS = _env_float("NASA_MCP_RATE_LIMIT_RPS", 10.0)
+RATE_LIMIT_BURST = _env_int("NASA_MCP_RATE_LIMIT_BURST", 20)
+MAX_IN_FLIGHT = _env_int("NASA_MCP_MAX_IN_FLIGHT", 16)
+
+# /search response cache (in-process TTL + LRU)
+SEARCH_CACHE_TTL = _env_float("NASA_MCP_SEARCH_CACHE_TTL", 900.0)
+SEARCH_CACHE_MAX_ENTRIES = _env_int("NASA_MCP_SEARCH_CACHE_MAX_ENTRIES", 512)
+SEARCH_CACHE_MAX_BYTES = _env_int("NASA_MCP_SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# /asset and /metadata manifest cache, keyed by nasa_id.
+# Manifests almost never change, so entries live long and are revalidated
+# with ETag / Last-Modified once stale. Set NASA_MCP_MANIFEST_CACHE_DIR to
+# persist them to disk across restarts.
+MANIFEST_CACHE_TTL = _env_float("NASA_MCP_MANIFEST_CACHE_TTL", 7 * 24 * 3600.0)
+MANIFEST_CACHE_MAX_ENTRIES = _env_int("NASA_MCP_MANIFEST_CACHE_MAX_ENTRIES", 4096)
+MANIFEST_CACHE_DIR = os.environ.get("NASA_MCP_MANIFEST_CACHE_DIR", "")
+
+# Cache backend: "memory" (per process) or "sqlite" (shared by every server
+# process on this machine via one WAL-mode database file)
+CACHE_BACKEND = os.environ.get("NASA_MCP_CACHE_BACKEND", "memory").strip().lower()
+CACHE_DB = os.environ.get(
+    "NASA_MCP_CACHE_DB",
+    os.path.join(os.path.expanduser("~"), ".cache", "nasa-mcp", "cache.sqlite3")
+)
+CACHE_DB_MAX_BYTES = _env_int("NASA_MCP_CACHE_DB_MAX_BYTES", 512 * 1024 * 1024)
+CACHE_DB_EVICT_INTERVAL = _env_float("NASA_MCP_CACHE_DB_EVICT_INTERVAL", 60.0)
+# Expired entries are kept this long for ETag revalidation before eviction drops them
+CACHE_DB_STALE_GRACE = _env_float("NASA_MCP_CACHE_DB_STALE_GRACE", 24 * 3600.0)
+
+# Parsed caption cache (cues per video nasa_id)
+CAPTIONS_CACHE_MAX_BYTES = _env_int("NASA_MCP_CAPTIONS_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+# Content-addressed blob cache for thumbnails (tools/blob_cache.py, tools/thumbnails.py).
+# With THUMBNAIL_PREFETCH=1, search_nasa_images fetches the thumbnails of each
+# result page in the background (bulk priority) so get_thumbnail answers from disk.
+# Only URLs on ASSET_HOSTS (or the API host) are fetched, here and by download_asset.
+BLOB_CACHE_DIR = os.environ.get(
+    "NASA_MCP_BLOB_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "nasa-mcp", "blobs")
+)
+BLOB_CACHE_MAX_BYTES = _env_int("NASA_MCP_BLOB_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+THUMBNAIL_PREFETCH = _env_int("NASA_MCP_THUMBNAIL_PREFETCH", 0)
+THUMBNAIL_PREFETCH_CONCURRENCY = _env_int("NASA_MCP_THUMBNAIL_PREFETCH_CONCURRENCY", 4)
+ASSET_HOSTS = tuple(
+    host.strip() for host in os.environ.get("NASA_MCP_ASSET_HOSTS", "images-assets.nasa.gov").split(",") if host.strip()
+)
+
+# Downloads of original-resolution assets (download_asset, python -m tools.downloader).
+# Files are fetched as DOWNLOAD_CHUNK_SIZE HTTP Range requests on up to
+# DOWNLOAD_CONNECTIONS parallel connections, written in place into a
+# preallocated .part file and resumed from its .part.json checkpoint.
+# DOWNLOAD_CHUNK_DEADLINE bounds one chunk including its retries (seconds).
+DOWNLOAD_DIR = os.environ.get(
+    "NASA_MCP_DOWNLOAD_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "nasa-mcp", "downloads")
+)
+DOWNLOAD_CONNECTIONS = _env_int("NASA_MCP_DOWNLOAD_CONNECTIONS", 4)
+DOWNLOAD_CHUNK_SIZE = _env_int("NASA_MCP_DOWNLOAD_CHUNK_SIZE", 8 * 1024 * 1024)
+DOWNLOAD_CHUNK_DEADLINE = _env_float("NASA_MCP_DOWNLOAD_CHUNK_DEADLINE", 300.0)
+
+# Batch tools (get_image_details_many)
+BATCH_MAX_IDS = _env_int("NASA_MCP_BATCH_MAX_IDS", 100)
+BATCH_CONCURRENCY = _env_int("NASA_MCP_BATCH_CONCURRENCY", 8)
+
+# Paginated search (search_nasa_images_all)
+PAGINATION_MAX_RESULTS = _env_int("NASA_MCP_PAGINATION_MAX_RESULTS", 1000)
+PAGINATION_CONCURRENCY = _env_int("NASA_MCP_PAGINATION_CONCURRENCY", 4)
+
+# Local full-text index of harvested search metadata (tools/harvester.py)
+INDEX_PATH = os.environ.get(
+    "NASA_MCP_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "nasa-mcp", "index.sqlite3")
+)
+
+# Add every caption fetched by get_captions / get_caption_cues to the local
+# index so search_captions can find it (0 disables)
+CAPTION_INDEX = _env_int("NASA_MCP_CAPTION_INDEX", 1)
@@ -0,0 +1,98 @@
+"""
+NASA Diagnostic Tools
+Tools for inspecting the server's caches and upstream request behaviour
+"""
+from . import config, http_client, metrics, nasa_api, rate_limit, resilience, thumbnails, tracing
+
+
+async def get_cache_stats() -> dict:
+    """
+    Get cache, request-coalescing and upstream health statistics for this server process.
+    
+    ⭐ Use this tool when:
+    - User or operator asks how well the caches are working
+    - Debugging why responses are slow or stale
+    - Checking whether NASA's API is currently degraded (circuit breaker state)
+    
+    Returns:
+        Hit/miss counters per cache (incl. stale answers served during outages),
+        thumbnail blob cache usage and prefetch counters,
+        deduplicated upstream calls, retries, per-host circuit breaker state and
+        rate limiter queueing delay per priority (interactive vs bulk)
+    """
+    return {
+        'caches': [cache.stats() for cache in nasa_api.CACHES],
+        'thumbnails': thumbnails.stats(),
+        'request_coalescing': http_client.singleflight.stats(),
+        'upstream': resilience.stats(),
+        'rate_limiter': rate_limit.governor.stats()
+    }
+
+
+async def get_metrics(format: str = "json") -> dict:
+    """
+    Get per-tool latency and upstream timing metrics for this server process.
+    
+    ⭐ Use this tool when:
+    - Operator asks which tools are slow or how often they fail
+    - Finding where time goes: NASA connect/TLS/TTFB/transfer, JSON parsing or serialization
+    - Exporting the metrics to Prometheus (format="openmetrics")
+    
+    Args:
+        format: "json" for a summary with p50/p95/p99 per tool, or "openmetrics"
+            for the full histograms in OpenMetrics text format
+    
+    Returns:
+        Calls, errors and latency percentiles per tool, upstream requests by
+        status and time per phase per host, JSON parse time and cache hit ratios
+    """
+    if format == "openmetrics":
+        return {'content_type': metrics.CONTENT_TYPE, 'text': metrics.render_openmetrics()}
+    if format != "json":
+        return {'error': f"Unknown format {format!r} (valid: json, openmetrics)"}
+    return metrics.snapshot()
+
+
+async def get_trace(limit: int = 10, tool: str = "", trace_id: str = "", clear: bool = False) -> dict:
+    """
+    Get the timeline of recent tool calls: their upstream requests and cache hits.
+    
+    ⭐ Use this tool when:
+    - Operator asks why an agent run or a tool call was slow
+    - Checking which calls overlapped, retried or were answered from cache
+    
+    Needs tracing enabled (NASA_MCP_TRACING=1 or NASA_MCP_TRACE_FILE).
+    
+    Args:
+        limit: Number of most recent traces (tool calls) to return (default 10)
+        tool: Only traces of this tool (e.g. "get_metadata")
+        trace_id: Only this trace
+        clear: Empty the span buffer after reading it
+    
+    Returns:
+        Traces newest first, each with its spans (tool call, upstream GETs)
+        ordered by start offset, with durations, status, nasa_id / query
+        attributes and cache events
+    """
+    if not tracing.enabled:
+        return {
+            'enabled': False,
+            'note': 'Tracing is disabled. Start the server with NASA_MCP_TRACING=1 (or NASA_MCP_TRACE_FILE=path).'
+        }
+    traces = tracing.recent_traces(limit=max(limit, 1), tool=tool, trace_id=trace_id)
+    if clear:
+        tracing.clear()
+    return {
+        'enabled': True,
+        'trace_file': config.TRACE_FILE or None,
+        'spans_recorded': tracing.spans_recorded,
+        'returned_traces': len(traces),
+        'traces': traces
+    }
+
+
+def register_diagnostic_tools(mcp):
+    """Register all diagnostic tools with the MCP server"""
+    mcp.tool()(get_cache_stats)
+    mcp.tool()(get_metrics)
+    mcp.tool()(get_trace)
@@ -0,0 +1,468 @@
+"""
+NASA Asset Downloader
+Downloads original-resolution assets (TIFFs and videos of hundreds of MB)
+to disk with parallel HTTP Range requests, without holding a file in memory.
+
+A one-byte Range request first learns the size, ETag and whether the host
+serves ranges. The file is then split into NASA_MCP_DOWNLOAD_CHUNK_SIZE
+chunks fetched by up to NASA_MCP_DOWNLOAD_CONNECTIONS concurrent workers.
+Each worker writes what it receives straight to its offset in a
+preallocated <name>.part file (os.pwrite from a buffer of at most
+WRITE_BUFFER bytes, in a worker thread), so memory use is bounded by
+connections x WRITE_BUFFER whatever the file size.
+
+Progress per chunk is checkpointed to <name>.part.json (after an fsync of
+the data it vouches for), so an interrupted download resumes with only the
+missing byte ranges. Chunk requests carry If-Range; if the file changed on
+the server the partial download is discarded and restarted. The finished
+file is checked against the announced length before it is renamed into
+place. Hosts that ignore Range are downloaded as one stream.
+
+Usage:
+    python -m tools.downloader https://images-assets.nasa.gov/image/as11-40-5903/as11-40-5903~orig.jpg
+    python -m tools.downloader --nasa-id as11-40-5903 --nasa-id KSC-69PC-442 --connections 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+from . import config, http_client, metrics, nasa_api, rate_limit, resilience
+from .metadata_tools import list_asset_files
+
+# Largest piece of a chunk kept in memory before it is written out
+WRITE_BUFFER = 1024 * 1024
+# Seconds between checkpoints / progress reports of one download
+CHECKPOINT_INTERVAL = 1.0
+PROGRESS_INTERVAL = 0.25
+
+# download_asset variant -> metadata_tools.classify_file type
+VARIANTS = {
+    'orig': 'Original',
+    'large': 'Large',
+    'medium': 'Medium',
+    'small': 'Small',
+    'thumb': 'Thumbnail'
+}
+
+counters = {'downloads': 0, 'completed': 0, 'resumed': 0, 'restarted': 0, 'failed': 0, 'bytes': 0}
+
+# Concurrent downloads of the same URL to the same path share one transfer
+_downloads = http_client.SingleFlight()
+
+
+class RemoteChanged(Exception):
+    """The file on the server is no longer the one a partial download started from."""
+
+
+def local_path(url: str, root: str = None) -> str:
+    """Where url is saved: its path on the asset host, below root (default NASA_MCP_DOWNLOAD_DIR)."""
+    parts = [unquote(part).replace('/', '_').replace('\\', '_') for part in urlsplit(url).path.split('/')]
+    parts = [part for part in parts if part not in ('', '.', '..')]
+    if not parts:
+        raise ValueError(f"No file name in URL: {url}")
+    return os.path.join(root or config.DOWNLOAD_DIR, *parts)
+
+
+async def asset_url(nasa_id: str, variant: str = "orig"):
+    """URL of one variant (orig, large, ...) of an item from its (cached) /asset manifest, or None."""
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown variant: {variant} (valid: {', '.join(VARIANTS)})")
+    asset = await nasa_api.get_asset(nasa_id)
+    for file in list_asset_files(asset):
+        if file['type'] == VARIANTS[variant]:
+            return file['url']
+    return None
+
+
+async def probe(url: str) -> dict:
+    """
+    Size, validators and range support of url, from a one-byte Range request.
+
+    Returns:
+        {'size', 'ranges', 'etag', 'last_modified', 'content_type'} - size is
+        None when the server announces no length
+    """
+    async def attempt():
+        headers = {"Range": "bytes=0-0", "Accept-Encoding": "identity"}
+        async with http_client.aopen(url, headers=headers) as response:
+            headers = response.headers
+            if response.status_code == 206:
+                total = headers.get("Content-Range", "").rpartition("/")[2]
+                size = int(total) if total.isdigit() else None
+            else:
+                length = headers.get("Content-Length", "")
+                size = int(length) if length.isdigit() and not headers.get("Content-Encoding") else None
+            return {
+                'size': size,
+                'ranges': response.status_code == 206 and size is not None,
+                'etag': headers.get("ETag"),
+                'last_modified': headers.get("Last-Modified"),
+                'content_type': headers.get("Content-Type", "").split(";")[0].strip() or None
+            }
+
+    return await resilience.call(url, attempt)
+
+
+class _PartFile:
+    """The .part file, written at explicit offsets by concurrent chunk workers."""
+
+    def __init__(self, path: str, size: int = None):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        # Without pwrite (Windows) seek + write pairs are serialized instead
+        self._lock = None if hasattr(os, 'pwrite') else threading.Lock()
+        if size is not None and os.fstat(self.fd).st_size != size:
+            os.ftruncate(self.fd, size)
+
+    def write(self, offset: int, data):
+        view = memoryview(data)
+        while view:
+            if self._lock is None:
+                written = os.pwrite(self.fd, view, offset)
+            else:
+                with self._lock:
+                    os.lseek(self.fd, offset, os.SEEK_SET)
+                    written = os.write(self.fd, view)
+            view = view[written:]
+            offset += written
+
+    def truncate(self, size: int = 0):
+        os.ftruncate(self.fd, size)
+
+    def sync(self):
+        os.fsync(self.fd)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Transfer:
+    """One run of a download: the chunk plan, the .part file and its checkpoint."""
+
+    def __init__(self, url: str, path: str, info: dict, connections: int, chunk_size: int, progress=None):
+        self.url = url
+        self.path = path
+        self.info = info
+        self.progress = progress
+        self.part_path = path + ".part"
+        self.checkpoint_path = path + ".part.json"
+        # A weak ETag cannot be used in If-Range; a date can
+        etag = info['etag']
+        self.if_range = etag if etag and not etag.startswith("W/") else info['last_modified']
+
+        size = info['size']
+        self.chunks = self._load_checkpoint() if info['ranges'] else None
+        if self.chunks is None:
+            self._remove_partial()
+            if info['ranges']:
+                self.chunks = [[start, min(start + chunk_size, size), 0] for start in range(0, size, chunk_size)]
+            else:
+                self.chunks = [[0, size, 0]]
+        self.resumed_from = self.downloaded
+        self.received = 0
+        remaining = sum(1 for chunk in self.chunks if not self._finished(chunk))
+        self.connections = max(1, min(connections, remaining)) if info['ranges'] else 1
+        self._io = set()
+        self._last_checkpoint = self._last_progress = time.monotonic()
+
+    @property
+    def downloaded(self) -> int:
+        return sum(chunk[2] for chunk in self.chunks)
+
+    @staticmethod
+    def _finished(chunk) -> bool:
+        return chunk[1] is not None and chunk[0] + chunk[2] >= chunk[1]
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.part_path) or any(
+            state.get(key) != value for key, value in (
+                ('url', self.url),
+                ('size', self.info['size']),
+                ('etag', self.info['etag']),
+                ('last_modified', self.info['last_modified'])
+            )
+        ):
+            return None
+        return state.get('chunks')
+
+    def _state(self) -> str:
+        return json.dumps({
+            'url': self.url,
+            'size': self.info['size'],
+            'etag': self.info['etag'],
+            'last_modified': self.info['last_modified'],
+            'chunks': self.chunks
+        })
+
+    def _save_checkpoint(self, part: _PartFile, state: str):
+        """Make the data the checkpoint vouches for durable, then replace the checkpoint."""
+        part.sync()
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(state)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _remove_partial(self):
+        for path in (self.part_path, self.checkpoint_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def _in_thread(self, fn, *args):
+        # Shielded and tracked: a cancelled worker must not leave a write
+        # running against a file descriptor that run() is about to close
+        future = asyncio.get_running_loop().run_in_executor(None, fn, *args)
+        self._io.add(future)
+        future.add_done_callback(self._io.discard)
+        return await asyncio.shield(future)
+
+    async def _write(self, part: _PartFile, chunk: list, offset: int, data: bytearray) -> int:
+        if chunk[1] is not None and offset + len(data) > chunk[1]:
+            raise RemoteChanged(f"{self.url} sent more bytes than announced")
+        await self._in_thread(part.write, offset, data)
+        chunk[2] += len(data)
+        self.received += len(data)
+        counters['bytes'] += len(data)
+
+        now = time.monotonic()
+        if self.info['ranges'] and now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self._last_checkpoint = now
+            await self._in_thread(self._save_checkpoint, part, self._state())
+        if self.progress is not None and now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            await self.progress(self.downloaded, self.info['size'])
+        return offset + len(data)
+
+    async def _fetch(self, part: _PartFile, chunk: list):
+        """Fetch the rest of one chunk, resuming from its last written byte on every retry."""
+        start, end = chunk[0], chunk[1]
+
+        async def attempt():
+            headers = {"Accept-Encoding": "identity"}
+            if self.info['ranges']:
+                offset = start + chunk[2]
+                if offset >= end:
+                    return
+                headers["Range"] = f"bytes={offset}-{end - 1}"
+                if self.if_range:
+                    headers["If-Range"] = self.if_range
+            else:
+                # Without ranges every attempt starts over: drop what the failed
+                # one wrote so a shorter body leaves no stale tail or inflated counts
+                if chunk[2]:
+                    await self._in_thread(part.truncate, 0)
+                    self.received -= chunk[2]
+                    counters['bytes'] -= chunk[2]
+                offset = chunk[2] = 0
+            async with http_client.aopen(self.url, headers=headers) as response:
+                if self.info['ranges']:
+                    expected = f"bytes {offset}-{end - 1}/{self.info['size']}"
+                    if response.status_code != 206 or response.headers.get("Content-Range") != expected:
+                        raise RemoteChanged(f"{self.url} changed on the server")
+                buffer = bytearray()
+                async for data in response.aiter_raw():
+                    buffer += data
+                    if len(buffer) >= WRITE_BUFFER:
+                        offset = await self._write(part, chunk, offset, buffer)
+                        buffer = bytearray()
+                if buffer:
+                    await self._write(part, chunk, offset, buffer)
+            if end is not None and start + chunk[2] != end:
+                raise httpx.RemoteProtocolError(f"Bytes {start}-{end - 1} of {self.url} ended early")
+
+        await resilience.call(self.url, attempt, deadline=config.DOWNLOAD_CHUNK_DEADLINE)
+
+    async def run(self):
+        pending = iter([chunk for chunk in self.chunks if not self._finished(chunk)])
+        part = _PartFile(self.part_path, self.info['size'] if self.info['ranges'] else None)
+
+        async def worker():
+            for chunk in pending:
+                await self._fetch(part, chunk)
+
+        tasks = [asyncio.ensure_future(worker()) for _ in range(self.connections)]
+        try:
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                if self._io:
+                    await asyncio.wait(list(self._io))
+            part.sync()
+        except BaseException:
+            if self.info['ranges']:
+                self._save_checkpoint(part, self._state())
+            part.close()
+            if not self.info['ranges']:
+                self._remove_partial()
+            raise
+        part.close()
+
+        size = os.path.getsize(self.part_path)
+        expected = self.info['size']
+        if expected is not None and (size != expected or self.downloaded != expected):
+            self._remove_partial()
+            raise ValueError(f"Downloaded {size:,} bytes of {self.url}, expected {expected:,}")
+        os.replace(self.part_path, self.path)
+        self._remove_partial()
+        if self.progress is not None:
+            await self.progress(size, size)
+
+
+def _result(url: str, path: str, info: dict, status: str, started: float, transfer: _Transfer = None) -> dict:
+    elapsed = time.perf_counter() - started
+    received = transfer.received if transfer else 0
+    return {
+        'url': url,
+        'path': path,
+        'status': status,
+        'size': os.path.getsize(path),
+        'content_type': info['content_type'],
+        'etag': info['etag'],
+        'resumed_from': transfer.resumed_from if transfer else 0,
+        'downloaded_bytes': received,
+        'chunks': len(transfer.chunks) if transfer else 0,
+        'connections': transfer.connections if transfer else 0,
+        'ranges': info['ranges'],
+        'elapsed_s': round(elapsed, 3),
+        'mb_per_s': round(received / 2 ** 20 / elapsed, 2) if elapsed else 0.0
+    }
+
+
+async def _download(url: str, path: str, connections: int, chunk_size: int, progress) -> dict:
+    started = time.perf_counter()
+    info = await probe(url)
+    if (
+        info['size'] is not None and not os.path.exists(path + ".part")
+        and os.path.isfile(path) and os.path.getsize(path) == info['size']
+    ):
+        return _result(url, path, info, 'already_complete', started)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    counters['downloads'] += 1
+    try:
+        # The transfers hold rate limiter slots for long; queued interactive requests go first
+        with rate_limit.bulk():
+            transfer = _Transfer(url, path, info, connections, chunk_size, progress)
+            if transfer.resumed_from:
+                counters['resumed'] += 1
+            try:
+                await transfer.run()
+            except RemoteChanged:
+                counters['restarted'] += 1
+                transfer._remove_partial()
+                info = await probe(url)
+                transfer = _Transfer(url, path, info, connections, chunk_size, progress)
+                await transfer.run()
+    except Exception:
+        counters['failed'] += 1
+        raise
+    counters['completed'] += 1
+    return _result(url, path, info, 'downloaded', started, transfer)
+
+
+async def download(url: str, path: str = None, connections: int = None, chunk_size: int = None,
+                   progress=None) -> dict:
+    """
+    Download url to path with parallel Range requests, resuming a partial download.
+
+    Args:
+        url: Asset URL
+        path: Target file (default: the URL's path below NASA_MCP_DOWNLOAD_DIR)
+        connections: Parallel connections (default NASA_MCP_DOWNLOAD_CONNECTIONS)
+        chunk_size: Bytes per Range request (default NASA_MCP_DOWNLOAD_CHUNK_SIZE)
+        progress: Optional coroutine function progress(done_bytes, total_bytes)
+
+    Returns:
+        {'url', 'path', 'status', 'size', 'content_type', 'etag', 'resumed_from',
+        'downloaded_bytes', 'chunks', 'connections', 'ranges', 'elapsed_s', 'mb_per_s'}
+        - status is 'downloaded' or 'already_complete'
+
+    Raises:
+        httpx.HTTPStatusError, resilience.CircuitOpenError, resilience.DeadlineExceeded,
+        ValueError (length mismatch) or OSError (disk)
+    """
+    path = path or local_path(url)
+    connections = max(connections or config.DOWNLOAD_CONNECTIONS, 1)
+    chunk_size = max(chunk_size or config.DOWNLOAD_CHUNK_SIZE, 64 * 1024)
+    return await _downloads.do((url, path), lambda: _download(url, path, connections, chunk_size, progress))
+
+
+def stats() -> dict:
+    return dict(counters, active=_downloads.stats()['in_flight'])
+
+
+def _download_metrics() -> list:
+    return [
+        ("nasa_mcp_download_bytes", "Bytes written by the asset downloader", [({}, counters['bytes'])]),
+        ("nasa_mcp_downloads_active", "Asset downloads in progress", [({}, _downloads.stats()['in_flight'])])
+    ]
+
+
+metrics.register_collector(_download_metrics)
+
+
+async def _run_cli(args) -> int:
+    urls = list(args.url)
+    for nasa_id in args.nasa_id:
+        url = await asset_url(nasa_id, args.variant)
+        if url is None:
+            print(f"{nasa_id}: no {args.variant} file listed", file=sys.stderr)
+            continue
+        urls.append(url)
+
+    failed = 0
+    for url in urls:
+        async def progress(done, total, url=url):
+            if total:
+                print(f"\r{url.rsplit('/', 1)[-1]}: {done / 2 ** 20:,.1f} / {total / 2 ** 20:,.1f} MB",
+                      end="", file=sys.stderr)
+
+        path = local_path(url, args.dest) if args.dest else None
+        try:
+            result = await download(url, path, args.connections, int(args.chunk_size_mb * 2 ** 20) or None, progress)
+        except Exception as e:
+            failed += 1
+            print(f"\n{url}: {e}", file=sys.stderr)
+            continue
+        resumed = f", resumed from {result['resumed_from']:,} bytes" if result['resumed_from'] else ""
+        print(f"\n{result['path']}: {result['size']:,} bytes, {result['status']}, "
+              f"{result['mb_per_s']} MB/s on {result['connections']} connection(s){resumed}", file=sys.stderr)
+    await http_client.aclose()
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Download NASA assets with parallel, resumable Range requests",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("url", nargs="*", help="Asset URL(s)")
+    parser.add_argument("--nasa-id", action="append", default=[], help="Download this item's file (repeatable)")
+    parser.add_argument("--variant", default="orig", choices=tuple(VARIANTS), help="File variant for --nasa-id")
+    parser.add_argument("--dest", help=f"Target directory (default {config.DOWNLOAD_DIR})")
+    parser.add_argument("--connections", type=int, default=None)
+    parser.add_argument("--chunk-size-mb", type=float, default=0)
+    args = parser.parse_args(argv)
+    if not args.url and not args.nasa_id:
+        parser.error("give at least one URL or --nasa-id")
+    sys.exit(asyncio.run(_run_cli(args)))
+
+
+if __name__ == "__main__":
+    main()
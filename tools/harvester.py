@@ -0,0 +1,302 @@
+"""
+NASA Search Harvester
+Pages through /search for configured queries and stores every item in the
+local full-text index (tools/local_index.py), so search_nasa_images can
+answer from disk with mode="prefer_local" or mode="offline".
+
+--sync refreshes an existing index incrementally: only years from the newest
+date_created already stored onwards are fetched, one year at a time, and a
+checkpoint is written after every page so an interrupted sync resumes where
+it stopped.
+
+Usage:
+    python -m tools.harvester --query "apollo 11" --query "mars rover" --media-type image
+    python -m tools.harvester --query hubble --year-start 1990 --year-end 2024 --split-years
+    python -m tools.harvester --config harvest.json
+    python -m tools.harvester --config harvest.json --sync
+    python -m tools.harvester --query apollo --media-type video --captions
+
+A config file is a JSON list of jobs with the same keys as the CLI:
+    [{"query": "apollo 11", "media_type": "image,video", "year_start": "1969", "year_end": "1972"}]
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+
+import httpx
+
+from . import config, http_client, nasa_api, rate_limit, resilience
+from .local_index import get_index
+
+async def harvest_captions(index, items: list) -> dict:
+    """
+    Fetch and index the captions of the video items not yet in the caption index.
+
+    HTTP errors other than 404, transport errors, an open circuit breaker,
+    an exceeded deadline, a malformed captions manifest or location
+    (ValueError) and a failed caption index write (sqlite3.Error) are logged
+    and counted as failed, so one flaky video doesn't abort a harvest whose
+    pages are already stored; the next run retries them. Anything else is raised.
+
+    Returns:
+        {'indexed': videos whose captions were indexed (including videos
+        without captions), 'failed': videos whose captions could not be fetched}
+    """
+    nasa_ids = []
+    for item in items:
+        data = (item.get('data') or [{}])[0]
+        if data.get('media_type') == 'video' and data.get('nasa_id') and not index.has_captions(data['nasa_id']):
+            nasa_ids.append(data['nasa_id'])
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+
+    async def fetch(nasa_id):
+        async with semaphore:
+            try:
+                captions = await nasa_api.get_caption_cues(nasa_id)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 404:
+                    print(f"  captions of {nasa_id} failed: {e}", file=sys.stderr)
+                    return 'failed'
+                captions = {'srt_url': None, 'cues': []}
+            except (resilience.CircuitOpenError, resilience.DeadlineExceeded, httpx.TransportError,
+                    ValueError, sqlite3.Error) as e:
+                print(f"  captions of {nasa_id} failed: {type(e).__name__}: {e}", file=sys.stderr)
+                return 'failed'
+        try:
+            if not index.has_captions(nasa_id):
+                index.index_captions(nasa_id, captions['srt_url'], captions['cues'])
+        except sqlite3.Error as e:
+            print(f"  captions of {nasa_id} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            return 'failed'
+        return 'indexed'
+
+    counts = {'indexed': 0, 'failed': 0}
+    for outcome in await asyncio.gather(*(fetch(nasa_id) for nasa_id in nasa_ids)):
+        counts[outcome] += 1
+    return counts
+
+
+def _add_counts(total, counts: dict):
+    if total is None:
+        return
+    for outcome, count in counts.items():
+        total[outcome] = total.get(outcome, 0) + count
+
+
+async def harvest_query(
+    index,
+    query: str,
+    media_type: str = "",
+    year_start: str = "",
+    year_end: str = "",
+    max_results: int = nasa_api.API_MAX_RESULTS,
+    captions: bool = False,
+    caption_counts: dict = None
+) -> int:
+    """
+    Harvest one query (and filter set) into the index.
+
+    With captions, the captions of every video result are indexed as well
+    and the outcomes of harvest_captions are added to caption_counts.
+
+    Returns:
+        Number of items inserted or changed
+    """
+    fetched = 0
+    written = 0
+    async for page, total_hits, items in nasa_api.iter_search_pages(
+        max_results,
+        cache=False,
+        stream=True,
+        q=query,
+        media_type=media_type,
+        year_start=year_start,
+        year_end=year_end
+    ):
+        fetched += len(items)
+        written += index.upsert_items(items)
+        if captions:
+            _add_counts(caption_counts, await harvest_captions(index, items))
+        print(
+            f"  [{query!r} {year_start or '*'}-{year_end or '*'}] page {page}: "
+            f"{fetched:,} / {min(total_hits, max_results):,} fetched, {written:,} new or changed",
+            file=sys.stderr
+        )
+    return written
+
+
+def job_key(job: dict) -> str:
+    """Stable identifier of a job's query and filters, used for its sync checkpoint."""
+    return json.dumps([
+        " ".join(job['query'].lower().split()),
+        job.get('media_type', '') or '',
+        str(job.get('year_start', '') or ''),
+        str(job.get('year_end', '') or '')
+    ])
+
+
+def _year_of(date_created):
+    return int(date_created[:4]) if date_created and date_created[:4].isdigit() else None
+
+
+async def sync_job(index, job: dict, caption_counts: dict = None) -> int:
+    """
+    Incrementally refresh one job.
+
+    The sync starts at the year of the newest date_created already stored
+    for the job (from its checkpoint, or from matching items in the index)
+    and walks one year at a time up to the job's year_end or the current
+    year. Items are upserted, so new and changed items are written and
+    unchanged ones are skipped. If a previous sync was interrupted it
+    resumes from the saved year and page. With captions, the outcomes of
+    harvest_captions are added to caption_counts.
+
+    Returns:
+        Number of items inserted or changed
+    """
+    key = job_key(job)
+    query = job['query']
+    media_type = job.get('media_type', '') or ''
+    checkpoint = index.get_checkpoint(key)
+
+    if checkpoint and checkpoint['status'] == 'running':
+        start_year = checkpoint['next_year']
+        start_page = checkpoint['next_page'] or 1
+        baseline = checkpoint['newest_date']
+        run_newest = checkpoint['run_newest_date']
+        print(f"Resuming sync of {query!r} at {start_year}, page {start_page}", file=sys.stderr)
+    else:
+        baseline = checkpoint['newest_date'] if checkpoint else index.newest_date_created(query, media_type)
+        start_year = _year_of(baseline) or _year_of(str(job.get('year_start', '') or ''))
+        start_page = 1
+        run_newest = baseline
+        print(f"Syncing {query!r} from {start_year or 'the beginning'} (newest stored: {baseline or 'none'})",
+              file=sys.stderr)
+
+    if job.get('year_start') and start_year:
+        start_year = max(start_year, int(job['year_start']))
+    last_year = int(job['year_end']) if job.get('year_end') else time.gmtime().tm_year
+    # Without any year to start from there is nothing to narrow on; walk the whole range in one segment
+    years = list(range(start_year, last_year + 1)) if start_year else [None]
+
+    written = 0
+    for year in years:
+        first_page = start_page if year == years[0] else 1
+        async for page, total_hits, items in nasa_api.iter_search_pages(
+            int(job.get('max_results') or nasa_api.API_MAX_RESULTS),
+            cache=False,
+            stream=True,
+            start_page=first_page,
+            q=query,
+            media_type=media_type,
+            year_start=str(year) if year else '',
+            year_end=str(year) if year else ''
+        ):
+            written += index.upsert_items(items)
+            if job.get('captions'):
+                _add_counts(caption_counts, await harvest_captions(index, items))
+            for item in items:
+                date_created = (item.get('data') or [{}])[0].get('date_created') or ''
+                if date_created > (run_newest or ''):
+                    run_newest = date_created
+            index.save_checkpoint(key, 'running', newest_date=baseline, next_year=year,
+                                  next_page=page + 1, run_newest_date=run_newest)
+        print(f"  [{query!r} {year or '*'}] synced, {written:,} new or changed so far", file=sys.stderr)
+        if year is not None and year != years[-1]:
+            index.save_checkpoint(key, 'running', newest_date=baseline, next_year=year + 1,
+                                  next_page=1, run_newest_date=run_newest)
+
+    index.save_checkpoint(key, 'complete', newest_date=run_newest)
+    return written
+
+
+async def harvest_job(index, job: dict, caption_counts: dict = None) -> int:
+    """
+    Harvest one job dict (query, media_type, year_start, year_end, max_results, split_years, captions).
+
+    With split_years the year range is walked one year at a time, which
+    works around the API's 10,000-result paging limit for broad queries.
+    """
+    query = job['query']
+    media_type = job.get('media_type', '')
+    year_start = str(job.get('year_start', '') or '')
+    year_end = str(job.get('year_end', '') or '')
+    max_results = int(job.get('max_results') or nasa_api.API_MAX_RESULTS)
+    captions = bool(job.get('captions'))
+
+    if job.get('split_years') and year_start:
+        last_year = int(year_end) if year_end else time.gmtime().tm_year
+        written = 0
+        for year in range(int(year_start), last_year + 1):
+            written += await harvest_query(index, query, media_type, str(year), str(year), max_results,
+                                           captions, caption_counts)
+        return written
+    return await harvest_query(index, query, media_type, year_start, year_end, max_results, captions, caption_counts)
+
+
+async def run(jobs: list, sync: bool = False) -> int:
+    index = get_index(create=True)
+    total = 0
+    # Caption fetches of this run (failed ones are retried by the next run)
+    caption_counts = {'indexed': 0, 'failed': 0}
+    try:
+        with rate_limit.bulk():
+            for job in jobs:
+                harvest = sync_job if sync else harvest_job
+                total += await harvest(index, job, caption_counts)
+    finally:
+        await http_client.aclose()
+    print(f"Wrote {total:,} new or changed items; index now holds {index.count():,} items ({index.path})",
+          file=sys.stderr)
+    if any(job.get('captions') for job in jobs):
+        stats = index.caption_stats()
+        print(f"Caption index: {stats['videos_with_captions']:,} captioned videos, {stats['cues']:,} cues "
+              f"({caption_counts['indexed']:,} videos indexed this run, {caption_counts['failed']:,} failed)",
+              file=sys.stderr)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Harvest NASA /search results into the local full-text index",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--query", action="append", default=[], help="Search query (repeatable)")
+    parser.add_argument("--media-type", default="", help='e.g. "image" or "image,video"')
+    parser.add_argument("--year-start", default="")
+    parser.add_argument("--year-end", default="")
+    parser.add_argument("--max-results", type=int, default=nasa_api.API_MAX_RESULTS)
+    parser.add_argument("--split-years", action="store_true", help="Harvest one year at a time")
+    parser.add_argument("--sync", action="store_true",
+                        help="Incremental refresh from the newest stored date_created (resumable)")
+    parser.add_argument("--captions", action="store_true",
+                        help="Also index the captions of video results (for search_captions)")
+    parser.add_argument("--config", help="JSON file with a list of harvest jobs")
+    args = parser.parse_args(argv)
+
+    jobs = []
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            jobs.extend(json.load(f))
+    for query in args.query:
+        jobs.append({
+            'query': query,
+            'media_type': args.media_type,
+            'year_start': args.year_start,
+            'year_end': args.year_end,
+            'max_results': args.max_results,
+            'split_years': args.split_years,
+            'captions': args.captions
+        })
+    if not jobs:
+        parser.error("give at least one --query or a --config file")
+
+    asyncio.run(run(jobs, sync=args.sync))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+NASA HTTP Client
+Shared, pooled HTTP clients used by every tool module.
+
+Keeping one client alive means repeated tool calls reuse warm keep-alive
+connections to images-api.nasa.gov and the asset CDN instead of paying a
+fresh TCP + TLS handshake on every request.
+
+Tools are async and use the httpx.AsyncClient (aget_json / aget_text), so
+concurrent MCP calls overlap their network I/O. The blocking requests.Session
+(get_json / get_text) is kept for scripts and benchmarks.
+"""
+import asyncio
+import contextlib
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import config, metrics, rate_limit, resilience, tracing
+
+_session = None
+_session_lock = threading.Lock()
+
+_async_client = None
+_async_loop = None
+
+
+def _build_session() -> requests.Session:
+    """Create a session with per-host connection pools and default headers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=config.POOL_HOSTS,
+        pool_maxsize=config.POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=Retry(
+            total=config.RETRY_ATTEMPTS - 1,
+            backoff_factor=config.RETRY_BACKOFF_BASE,
+            status_forcelist=sorted(resilience.RETRYABLE_STATUS),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": config.USER_AGENT,
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive"
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close():
+    """Close the shared session and drop all pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    """Create an async client sharing one connection pool across all tools."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.POOL_HOSTS * config.POOL_MAXSIZE,
+            max_keepalive_connections=config.POOL_HOSTS * config.POOL_MAXSIZE
+        ),
+        timeout=httpx.Timeout(config.READ_TIMEOUT, connect=config.CONNECT_TIMEOUT),
+        headers={
+            "User-Agent": config.USER_AGENT,
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate"
+        },
+        follow_redirects=True
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared async client for the running event loop.
+
+    httpx connections are bound to the loop that opened them, so a new client
+    is created if the server (or a script calling asyncio.run twice) switches loops.
+    """
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop or _async_client.is_closed:
+        _async_client = _build_async_client()
+        _async_loop = loop
+    return _async_client
+
+
+async def aclose():
+    """Close the shared async client and drop all pooled connections."""
+    global _async_client, _async_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        _async_loop = None
+
+
+def get(url: str, params: dict = None, timeout: float = None) -> requests.Response:
+    """
+    GET a URL through the shared session and raise on HTTP errors.
+
+    Args:
+        url: Absolute URL to fetch
+        params: Optional query parameters
+        timeout: Optional read timeout override (seconds)
+
+    Returns:
+        The successful response
+    """
+    response = get_session().get(
+        url,
+        params=params,
+        timeout=(config.CONNECT_TIMEOUT, timeout or config.READ_TIMEOUT)
+    )
+    response.raise_for_status()
+    return response
+
+
+def get_json(url: str, params: dict = None, timeout: float = None):
+    """GET a URL and return the decoded JSON body."""
+    return get(url, params=params, timeout=timeout).json()
+
+
+def get_text(url: str, timeout: float = None) -> str:
+    """GET a URL and return the decoded text body."""
+    return get(url, timeout=timeout).text
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive the same result (or error).
+    The shared task is shielded, so one caller being cancelled does not abort
+    the request for the others.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.deduplicated = 0
+
+    async def do(self, key, fn):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+            tracing.add_event("coalesced", url=key[0])
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        total = self.leaders + self.deduplicated
+        return {
+            'upstream_requests': self.leaders,
+            'deduplicated': self.deduplicated,
+            'in_flight': len(self._inflight),
+            'dedup_ratio': round(self.deduplicated / total, 3) if total else 0.0
+        }
+
+
+singleflight = SingleFlight()
+
+
+async def aget(url: str, params: dict = None, timeout: float = None, headers: dict = None) -> httpx.Response:
+    """
+    Async GET through the shared client; raises httpx.HTTPStatusError on HTTP errors.
+
+    Every attempt waits for a slot from the rate limiter (tools/rate_limit.py).
+    Transient failures are retried with backoff within NASA_MCP_REQUEST_DEADLINE,
+    and calls fail fast with resilience.CircuitOpenError while the host's
+    circuit breaker is open (see tools/resilience.py).
+
+    Args:
+        url: Absolute URL to fetch
+        params: Optional query parameters
+        timeout: Optional read timeout override (seconds)
+        headers: Optional extra request headers (e.g. If-None-Match)
+
+    Returns:
+        The successful response, or a 304 response for a conditional GET
+    """
+    kwargs = {"params": params, "headers": headers}
+    if timeout:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=config.CONNECT_TIMEOUT)
+    host = metrics.host_of(url)
+
+    async def attempt():
+        start = time.perf_counter()
+        status = "error"
+        with tracing.span("GET", url=url, host=host, params=params) as span:
+            try:
+                async with rate_limit.governor.slot():
+                    span.set_attribute('rate_limit_wait_ms', round((time.perf_counter() - start) * 1000, 3))
+                    response = await get_async_client().get(
+                        url, extensions={"trace": metrics.UpstreamTimer(host)}, **kwargs
+                    )
+                status = str(response.status_code)
+            finally:
+                span.set_attribute('status', status)
+                metrics.UPSTREAM_REQUESTS.inc(host, status)
+                metrics.UPSTREAM_DURATION.observe(time.perf_counter() - start, host)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    return await resilience.call(url, attempt)
+
+
+async def afetch(url: str, params: dict = None, timeout: float = None, headers: dict = None, parse: str = "json"):
+    """
+    Coalesced async GET: identical concurrent requests share one upstream call.
+
+    Requests are identical when URL, query parameters, extra headers and
+    parse mode all match. The body is parsed once inside the shared call, so
+    every waiter receives the same object and must treat it as read-only.
+
+    Args:
+        url: Absolute URL to fetch
+        params: Optional query parameters
+        timeout: Optional read timeout override (seconds)
+        headers: Optional extra request headers (e.g. If-None-Match)
+        parse: "json", "text" or "bytes"
+
+    Returns:
+        (response, body) - body is None for a 304 response
+    """
+    key = (
+        url,
+        tuple(sorted((params or {}).items())),
+        tuple(sorted((headers or {}).items())),
+        parse
+    )
+
+    async def fetch():
+        response = await aget(url, params=params, timeout=timeout, headers=headers)
+        if response.status_code == 304:
+            return response, None
+        if parse == "json":
+            start = time.perf_counter()
+            data = response.json()
+            metrics.JSON_PARSE.observe(time.perf_counter() - start, metrics.host_of(url))
+            return response, data
+        if parse == "text":
+            return response, response.text
+        return response, response.content
+
+    return await singleflight.do(key, fetch)
+
+
+async def astream(url: str, params: dict = None, timeout: float = None, chunk_size: int = 16384):
+    """
+    Async generator yielding the (decompressed) response body in chunks as it arrives.
+
+    Not coalesced, cached or retried (a partially consumed body cannot be
+    replayed) - used by incremental parsers that must not hold the whole
+    body in memory. The host's circuit breaker still applies.
+    """
+    kwargs = {"params": params}
+    if timeout:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=config.CONNECT_TIMEOUT)
+    breaker = resilience.get_breaker(url)
+    breaker.allow()
+    host = metrics.host_of(url)
+    status = "error"
+    span = tracing.start_span("GET (stream)", url=url, host=host, params=params)
+    error = None
+    try:
+        async with rate_limit.governor.slot():
+            async with get_async_client().stream(
+                "GET", url, extensions={"trace": metrics.UpstreamTimer(host)}, **kwargs
+            ) as response:
+                status = str(response.status_code)
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(chunk_size):
+                    yield chunk
+    except (asyncio.CancelledError, GeneratorExit) as e:
+        error = e
+        breaker.release()
+        raise
+    except Exception as e:
+        error = e
+        if resilience.is_retryable(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    finally:
+        metrics.UPSTREAM_REQUESTS.inc(host, status)
+        span.set_attribute('status', status)
+        span.end(error)
+    breaker.record_success()
+
+
+@contextlib.asynccontextmanager
+async def aopen(url: str, headers: dict = None, timeout: float = None):
+    """
+    One streamed GET attempt; yields the response with its body still unread.
+
+    Like an aget attempt it waits for a rate limiter slot (held until the
+    body is consumed), is counted in the upstream metrics and traced, and
+    raises httpx.HTTPStatusError on HTTP errors - but it is not retried or
+    guarded by the circuit breaker, so callers that can resume a partial
+    body wrap their attempts in resilience.call themselves.
+    """
+    kwargs = {"headers": headers}
+    if timeout:
+        kwargs["timeout"] = httpx.Timeout(timeout, connect=config.CONNECT_TIMEOUT)
+    host = metrics.host_of(url)
+    status = "error"
+    with tracing.span("GET (stream)", url=url, host=host, range=(headers or {}).get("Range")) as span:
+        try:
+            async with rate_limit.governor.slot():
+                async with get_async_client().stream(
+                    "GET", url, extensions={"trace": metrics.UpstreamTimer(host)}, **kwargs
+                ) as response:
+                    status = str(response.status_code)
+                    response.raise_for_status()
+                    yield response
+        finally:
+            span.set_attribute('status', status)
+            metrics.UPSTREAM_REQUESTS.inc(host, status)
+
+
+async def aget_json(url: str, params: dict = None, timeout: float = None):
+    """Async GET a URL and return the decoded JSON body (coalesced)."""
+    _, data = await afetch(url, params=params, timeout=timeout, parse="json")
+    return data
+
+
+async def aget_text(url: str, timeout: float = None) -> str:
+    """Async GET a URL and return the decoded text body (coalesced)."""
+    _, text = await afetch(url, timeout=timeout, parse="text")
+    return text
+
+
+def api_url(path: str) -> str:
+    """Build an absolute NASA API URL from an endpoint path like '/search'."""
+    return f"{config.API_BASE}/{path.lstrip('/')}"
@@ -0,0 +1,434 @@
+"""
+NASA Local Index
+SQLite FTS5 full-text index of harvested /search metadata, used to answer
+searches offline in milliseconds (see tools/harvester.py to fill it), and
+of parsed video captions for search_captions.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from . import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    nasa_id TEXT NOT NULL UNIQUE,
+    title TEXT,
+    description TEXT,
+    keywords TEXT,
+    center TEXT,
+    date_created TEXT,
+    year INTEGER,
+    media_type TEXT,
+    thumbnail_url TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_items_year ON items(year);
+CREATE INDEX IF NOT EXISTS idx_items_date_created ON items(date_created);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, description, keywords, center,
+    content='items', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, title, description, keywords, center)
+    VALUES (new.rowid, new.title, new.description, new.keywords, new.center);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, keywords, center)
+    VALUES ('delete', old.rowid, old.title, old.description, old.keywords, old.center);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, keywords, center)
+    VALUES ('delete', old.rowid, old.title, old.description, old.keywords, old.center);
+    INSERT INTO items_fts(rowid, title, description, keywords, center)
+    VALUES (new.rowid, new.title, new.description, new.keywords, new.center);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    job_key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    newest_date TEXT,
+    next_year INTEGER,
+    next_page INTEGER,
+    run_newest_date TEXT,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS caption_sources (
+    nasa_id TEXT PRIMARY KEY,
+    srt_url TEXT,
+    cue_count INTEGER NOT NULL,
+    indexed_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS caption_cues (
+    rowid INTEGER PRIMARY KEY,
+    nasa_id TEXT NOT NULL,
+    cue_index INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_caption_cues_nasa_id ON caption_cues(nasa_id, cue_index);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS captions_fts USING fts5(
+    text,
+    content='caption_cues', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS caption_cues_ai AFTER INSERT ON caption_cues BEGIN
+    INSERT INTO captions_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS caption_cues_ad AFTER DELETE ON caption_cues BEGIN
+    INSERT INTO captions_fts(captions_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+"""
+
+# bm25 column weights: title, description, keywords, center
+RANK_WEIGHTS = (10.0, 1.0, 5.0, 0.5)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match (implicit AND); the last word is also matched as a
+    prefix so "apoll" finds "apollo". Punctuation is dropped, which keeps
+    user input from being interpreted as FTS5 syntax.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return ""
+    terms = [f'"{token}"' for token in tokens[:-1]]
+    terms.append(f'"{tokens[-1]}"*')
+    return " ".join(terms)
+
+
+def _year(date_created: str):
+    match = re.match(r"(\d{4})", date_created or "")
+    return int(match.group(1)) if match else None
+
+
+class LocalIndex:
+    """Full-text index of NASA search items stored in one SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def upsert_items(self, items: list) -> int:
+        """
+        Insert or update raw /search collection items.
+
+        Unchanged items are skipped, so re-syncing a page that is already
+        stored costs no FTS re-indexing.
+
+        Args:
+            items: Items as returned in collection.items by /search
+
+        Returns:
+            Number of items inserted or changed
+        """
+        rows = []
+        now = time.time()
+        for item in items:
+            data = (item.get('data') or [{}])[0]
+            nasa_id = data.get('nasa_id')
+            if not nasa_id:
+                continue
+            links = item.get('links') or []
+            rows.append((
+                nasa_id,
+                data.get('title', ''),
+                data.get('description', ''),
+                ", ".join(data.get('keywords') or []),
+                data.get('center', ''),
+                data.get('date_created', ''),
+                _year(data.get('date_created', '')),
+                data.get('media_type', ''),
+                links[0].get('href') if links else None,
+                now
+            ))
+        with self._lock, self._conn:
+            cursor = self._conn.executemany("""
+                INSERT INTO items (nasa_id, title, description, keywords, center,
+                                   date_created, year, media_type, thumbnail_url, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(nasa_id) DO UPDATE SET
+                    title = excluded.title,
+                    description = excluded.description,
+                    keywords = excluded.keywords,
+                    center = excluded.center,
+                    date_created = excluded.date_created,
+                    year = excluded.year,
+                    media_type = excluded.media_type,
+                    thumbnail_url = excluded.thumbnail_url,
+                    indexed_at = excluded.indexed_at
+                WHERE items.title IS NOT excluded.title
+                   OR items.description IS NOT excluded.description
+                   OR items.keywords IS NOT excluded.keywords
+                   OR items.center IS NOT excluded.center
+                   OR items.date_created IS NOT excluded.date_created
+                   OR items.media_type IS NOT excluded.media_type
+                   OR items.thumbnail_url IS NOT excluded.thumbnail_url
+            """, rows)
+            # rowcount excludes the FTS trigger writes and skipped no-op updates
+            return cursor.rowcount
+
+    def search(
+        self,
+        query: str,
+        media_type: str = "",
+        year_start: str = "",
+        year_end: str = "",
+        limit: int = 10,
+        offset: int = 0
+    ) -> tuple:
+        """
+        Ranked full-text search.
+
+        Returns:
+            (total_matches, rows) where rows are dicts shaped like the live
+            search tool results
+        """
+        match = build_match_query(query)
+        if not match:
+            return 0, []
+
+        where = ["items_fts MATCH ?"]
+        params = [match]
+        media_types = [m.strip().lower() for m in media_type.split(",") if m.strip()]
+        if media_types:
+            where.append(f"items.media_type IN ({','.join('?' * len(media_types))})")
+            params.extend(media_types)
+        if str(year_start).strip():
+            where.append("items.year >= ?")
+            params.append(int(year_start))
+        if str(year_end).strip():
+            where.append("items.year <= ?")
+            params.append(int(year_end))
+        where_sql = " AND ".join(where)
+
+        with self._lock:
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM items_fts JOIN items ON items.rowid = items_fts.rowid WHERE {where_sql}",
+                params
+            ).fetchone()[0]
+            cursor = self._conn.execute(
+                f"""
+                SELECT items.title, items.nasa_id, items.description, items.date_created,
+                       items.media_type, items.thumbnail_url, items.keywords, items.center
+                FROM items_fts JOIN items ON items.rowid = items_fts.rowid
+                WHERE {where_sql}
+                ORDER BY bm25(items_fts, {', '.join(str(w) for w in RANK_WEIGHTS)})
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            )
+            rows = [
+                {
+                    'title': title or 'Untitled',
+                    'nasa_id': nasa_id,
+                    'description': description or '',
+                    'date_created': date_created or '',
+                    'media_type': media_type or 'image',
+                    'thumbnail_url': thumbnail_url,
+                    'keywords': keywords.split(', ') if keywords else [],
+                    'center': center or ''
+                }
+                for (title, nasa_id, description, date_created, media_type,
+                     thumbnail_url, keywords, center) in cursor
+            ]
+        return total, rows
+
+    def has_items(self) -> bool:
+        """False while no search items are stored (e.g. an index holding only captions)."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM items LIMIT 1").fetchone() is not None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def newest_date_created(self, query: str = "", media_type: str = ""):
+        """Newest date_created among stored items matching query / media_type, or None."""
+        where = ["items.date_created != ''"]
+        params = []
+        join = ""
+        match = build_match_query(query) if query else ""
+        if match:
+            join = "JOIN items_fts ON items.rowid = items_fts.rowid"
+            where.append("items_fts MATCH ?")
+            params.append(match)
+        media_types = [m.strip().lower() for m in media_type.split(",") if m.strip()]
+        if media_types:
+            where.append(f"items.media_type IN ({','.join('?' * len(media_types))})")
+            params.extend(media_types)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT MAX(items.date_created) FROM items {join} WHERE {' AND '.join(where)}",
+                params
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_checkpoint(self, job_key: str):
+        """Return the sync checkpoint dict for a job, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, newest_date, next_year, next_page, run_newest_date "
+                "FROM sync_checkpoints WHERE job_key = ?",
+                (job_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('status', 'newest_date', 'next_year', 'next_page', 'run_newest_date'), row))
+
+    def save_checkpoint(self, job_key: str, status: str, newest_date=None, next_year=None,
+                        next_page=None, run_newest_date=None):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO sync_checkpoints
+                    (job_key, status, newest_date, next_year, next_page, run_newest_date, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (job_key, status, newest_date, next_year, next_page, run_newest_date, time.time()))
+
+    def index_captions(self, nasa_id: str, srt_url, cues: list):
+        """
+        Store (or replace) the parsed caption cues of one video.
+
+        A video without captions is recorded with zero cues, so harvests
+        don't ask for it again.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM caption_cues WHERE nasa_id = ?", (nasa_id,))
+            self._conn.executemany(
+                "INSERT INTO caption_cues (nasa_id, cue_index, start, end, text) VALUES (?, ?, ?, ?, ?)",
+                [(nasa_id, cue['index'], cue['start'], cue['end'], cue['text']) for cue in cues]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO caption_sources (nasa_id, srt_url, cue_count, indexed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (nasa_id, srt_url, len(cues), time.time())
+            )
+
+    def has_captions(self, nasa_id: str) -> bool:
+        """True when the captions of nasa_id (possibly none) are already indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM caption_sources WHERE nasa_id = ?", (nasa_id,)
+            ).fetchone()
+        return row is not None
+
+    def caption_stats(self) -> dict:
+        with self._lock:
+            videos, with_captions = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(cue_count > 0), 0) FROM caption_sources"
+            ).fetchone()
+            cues = self._conn.execute("SELECT COUNT(*) FROM caption_cues").fetchone()[0]
+        return {'videos': videos, 'videos_with_captions': with_captions, 'cues': cues}
+
+    def search_captions(
+        self,
+        query: str,
+        nasa_ids: list = None,
+        limit: int = 20,
+        offset: int = 0,
+        cues_per_video: int = 5
+    ) -> tuple:
+        """
+        Ranked full-text search over indexed caption cues, grouped by video.
+
+        Videos are ordered by their best-matching cue; within a video its
+        best cues_per_video matches are returned in playback order.
+
+        Returns:
+            (total_videos, videos) where each video is
+            {'nasa_id', 'title', 'match_count', 'cues': [{'index', 'start', 'end', 'text'}]}
+        """
+        match = build_match_query(query)
+        if not match:
+            return 0, []
+
+        where = "captions_fts MATCH ?"
+        params = [match]
+        if nasa_ids:
+            where += f" AND caption_cues.nasa_id IN ({','.join('?' * len(nasa_ids))})"
+            params.extend(nasa_ids)
+
+        # One pass in rank order: a video's position is that of its best cue
+        groups = {}
+        with self._lock:
+            cursor = self._conn.execute(
+                f"""
+                SELECT caption_cues.nasa_id, caption_cues.cue_index, caption_cues.start,
+                       caption_cues.end, caption_cues.text
+                FROM captions_fts JOIN caption_cues ON caption_cues.rowid = captions_fts.rowid
+                WHERE {where}
+                ORDER BY captions_fts.rank
+                """,
+                params
+            )
+            for nasa_id, index, start, end, text in cursor:
+                group = groups.setdefault(nasa_id, {'match_count': 0, 'cues': []})
+                group['match_count'] += 1
+                if len(group['cues']) < cues_per_video:
+                    group['cues'].append({'index': index, 'start': start, 'end': end, 'text': text})
+
+            page = list(groups.items())[offset:offset + limit]
+            titles = {}
+            if page:
+                titles = dict(self._conn.execute(
+                    f"SELECT nasa_id, title FROM items WHERE nasa_id IN ({','.join('?' * len(page))})",
+                    [nasa_id for nasa_id, _ in page]
+                ).fetchall())
+
+        videos = [
+            {
+                'nasa_id': nasa_id,
+                'title': titles.get(nasa_id),
+                'match_count': group['match_count'],
+                'cues': sorted(group['cues'], key=lambda cue: cue['index'])
+            }
+            for nasa_id, group in page
+        ]
+        total = len(groups)
+        return total, videos
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index(create: bool = False):
+    """
+    Return the shared LocalIndex at NASA_MCP_INDEX_PATH.
+
+    Returns None when the index file does not exist yet and create is False,
+    so read-only callers can fall back to the live API.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            if not create and not os.path.exists(config.INDEX_PATH):
+                return None
+            _index = LocalIndex(config.INDEX_PATH)
+        return _index
@@ -1,108 +1,386 @@
 """
 NASA Media Tools
-Tools for accessing video captions and media-specific features
+Tools for accessing video captions, thumbnails, original-file downloads
+and media-specific features
 """
-import requests
+import asyncio
+import base64
+from typing import Optional
 
-def register_media_tools(mcp):
-    """Register all media-related tools with the MCP server"""
+import httpx
+from fastmcp import Context
+
+from . import downloader, nasa_api, resilience, thumbnails
+from .captions import format_cue, format_timestamp, select_cues
+from .local_index import get_index
+
+
+async def get_captions(nasa_id: str, preview_cues: int = 20) -> dict:
+    """
+    Get video caption/subtitle overview: cue count, duration and the first cues.
+
+    The SRT file is downloaded via the API (direct browser access is blocked),
+    parsed into cues and cached, so follow-up calls are free.
+
+    ⭐ Use this tool when:
+    - User asks whether a video has captions or wants a transcript overview
+    - You need the caption length before fetching a specific part
+
+    ⚠️ For a time window, a cue range or a text search inside the captions,
+    use get_caption_cues instead of paging through this tool.
+
+    Args:
+        nasa_id: NASA ID of the VIDEO
+        preview_cues: Number of leading cues to include (default: 20, max: 200)
+
+    Returns:
+        Caption overview with srt_url, cue_count, duration and the first cues
+    """
+    try:
+        captions = await nasa_api.get_caption_cues(nasa_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return {'error': f'No captions found for video: {nasa_id}', 'status_code': 404}
+        return {'error': f'HTTP Error: {e}', 'status_code': e.response.status_code}
+    except Exception as e:
+        return {
+            'nasa_id': nasa_id,
+            'error': f'Could not download SRT: {str(e)}'
+        }
+
+    if not captions['srt_url']:
+        return {'error': f'No captions found for video: {nasa_id}'}
+
+    cues = captions['cues']
+    preview_cues = max(0, min(preview_cues, 200))
+    return {
+        'nasa_id': nasa_id,
+        'format': 'SRT',
+        'srt_url': captions['srt_url'],
+        'cue_count': len(cues),
+        'duration': format_timestamp(cues[-1]['end']) if cues else None,
+        'cues': [format_cue(cue) for cue in cues[:preview_cues]],
+        'truncated': len(cues) > preview_cues,
+        'note': 'Use get_caption_cues for a time window, cue range or text search'
+    }
+
+
+async def get_caption_cues(
+    nasa_id: str,
+    start_time: str = "",
+    end_time: str = "",
+    cue_start: int = 0,
+    cue_end: int = 0,
+    query: str = "",
+    limit: int = 100,
+    offset: int = 0
+) -> dict:
+    """
+    Get the caption cues of a video for a time window, a cue range or a text search.
+
+    ⭐ Use this tool when:
+    - User asks what is said at a point in a video ("what happens at 12:30?")
+    - User wants a part of the transcript (cues 100-150, minutes 5 to 10)
+    - User asks where/when something is mentioned ("when do they say 'Eagle'?")
+
+    Filters combine; with none given the cues are returned in pages.
+
+    Args:
+        nasa_id: NASA ID of the VIDEO
+        start_time: Window start, "HH:MM:SS", "MM:SS" or seconds (optional)
+        end_time: Window end, same formats (optional)
+        cue_start: First cue number, 1-based inclusive (optional)
+        cue_end: Last cue number, inclusive (optional)
+        query: Only cues containing all of these words (optional)
+        limit: Maximum cues to return (default: 100, max: 500)
+        offset: Number of matching cues to skip, for paging
+
+    Returns:
+        Matching cues with index, start, end and text
+    """
+    try:
+        captions = await nasa_api.get_caption_cues(nasa_id)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return {'error': f'No captions found for video: {nasa_id}', 'status_code': 404}
+        return {'error': f'HTTP Error: {e}', 'status_code': e.response.status_code}
+    except Exception as e:
+        return {'nasa_id': nasa_id, 'error': f'Could not download SRT: {str(e)}'}
+
+    if not captions['srt_url']:
+        return {'error': f'No captions found for video: {nasa_id}'}
+
+    try:
+        matches = select_cues(
+            captions['cues'],
+            start_time=start_time,
+            end_time=end_time,
+            cue_start=cue_start or None,
+            cue_end=cue_end or None,
+            query=query
+        )
+    except ValueError as e:
+        return {'error': str(e)}
+
+    limit = max(1, min(limit, 500))
+    offset = max(0, offset)
+    page = matches[offset:offset + limit]
+    return {
+        'nasa_id': nasa_id,
+        'cue_count': len(captions['cues']),
+        'matched_cues': len(matches),
+        'returned_cues': len(page),
+        'offset': offset,
+        'has_more': offset + len(page) < len(matches),
+        'cues': [format_cue(cue) for cue in page]
+    }
+
+
+async def search_captions(
+    query: str,
+    nasa_ids: Optional[list[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+    cues_per_video: int = 5
+) -> dict:
+    """
+    Full-text search inside video captions, answered from the local caption index.
+
+    ⭐ Use this tool when:
+    - User asks which videos mention something ("which Apollo videos say 'Tranquility Base'?")
+    - User wants the moments in videos where a phrase is spoken
+
+    Searches every caption fetched so far with get_captions / get_caption_cues
+    and every caption pre-harvested with `python -m tools.harvester --captions`.
+    No live downloads: videos whose captions were never fetched are not found.
+
+    Args:
+        query: Words to find; all must occur in one cue (last word matches as a prefix)
+        nasa_ids: Only search these videos (optional)
+        limit: Maximum videos to return (default: 20, max: 100)
+        offset: Number of videos to skip, for paging
+        cues_per_video: Maximum matching cues listed per video (default: 5, max: 50)
+
+    Returns:
+        Matching videos (best match first) with cue timestamps and text
+    """
+    # SQLite reads off the event loop: caption indexing holds the index lock in a worker thread
+    index = await asyncio.to_thread(get_index)
+    if index is None:
+        return {
+            'error': 'Caption index not found',
+            'note': 'Fetch captions with get_captions or run: python -m tools.harvester --query ... --media-type video --captions'
+        }
+
+    limit = max(1, min(limit, 100))
+    cues_per_video = max(1, min(cues_per_video, 50))
+    total, videos = await asyncio.to_thread(
+        index.search_captions,
+        query,
+        nasa_ids=nasa_ids,
+        limit=limit,
+        offset=max(0, offset),
+        cues_per_video=cues_per_video
+    )
+    stats = await asyncio.to_thread(index.caption_stats)
+    for video in videos:
+        video['cues'] = [format_cue(cue) for cue in video['cues']]
+    return {
+        'source': 'local_caption_index',
+        'query': query,
+        'total_videos': total,
+        'returned_videos': len(videos),
+        'videos_indexed': stats['videos_with_captions'],
+        'results': videos
+    }
+
+
+async def get_video_details(nasa_id: str) -> dict:
+    """
+    Get video file information and metadata (NOT for images!).
     
-    @mcp.tool()
-    def get_captions(nasa_id: str) -> dict:
-        """
-        Get video caption/subtitle information.
-        Downloads and returns the actual SRT content since direct browser access is blocked.
-        """
-        url = f"https://images-api.nasa.gov/captions/{nasa_id}"
-        
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+    ⭐ Use ONLY for videos (media_type="video")
+    For images, use get_image_details instead.
+    
+    ⭐ Use this tool when:
+    - User asks for video details
+    - User wants video file information
+    - User says "show me video [NASA_ID]"
+    - NASA ID is from a VIDEO search result
+    
+    ❌ DO NOT use for images - use get_image_details
+    
+    Note: Videos do NOT have /asset endpoint like images.
+    This tool returns metadata which contains video information.
+    
+    Args:
+        nasa_id: NASA ID of the VIDEO (e.g., "NHQ_2021_0222_VF_...")
         
-        # Get the SRT file location
-        srt_url = data.get('location')
+    Returns:
+        Video metadata and information
+    """
+    try:
+        # Videos don't have an /asset endpoint; resolve /metadata to its metadata.json
+        metadata_url, metadata = await nasa_api.get_metadata_document(nasa_id)
         
-        if not srt_url:
-            return {'error': f'No captions found for video: {nasa_id}'}
+        return {
+            'nasa_id': nasa_id,
+            'media_type': 'video',
+            'metadata_url': metadata_url,
+            'metadata': metadata,
+            'note': 'Videos do not have multiple file versions like images. Check NASA website for video player or download options.',
+            'nasa_website': f'https://images.nasa.gov/details/{nasa_id}'
+        }
         
-        # Download the actual SRT content (browser can't access directly)
-        try:
-            srt_response = requests.get(srt_url, timeout=15)
-            srt_response.raise_for_status()
-            srt_content = srt_response.text
-            
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
             return {
-                'nasa_id': nasa_id,
-                'format': 'SRT',
-                'srt_url': srt_url,
-                'content_preview': srt_content[:1000],  # First 1000 chars
-                'full_content': srt_content,
-                'note': 'SRT content downloaded via API (direct browser access is blocked by NASA)'
+                'error': f'Video not found: {nasa_id}',
+                'note': 'This NASA ID does not exist or is not a video. Try searching for videos first.',
+                'status_code': 404
             }
-        except Exception as e:
+        else:
             return {
-                'nasa_id': nasa_id,
-                'srt_url': srt_url,
-                'error': f'Could not download SRT: {str(e)}',
-                'note': 'URL is valid but download failed'
+                'error': f'HTTP Error: {e}',
+                'status_code': e.response.status_code
             }
-    @mcp.tool()
-    def get_video_details(nasa_id: str) -> dict:
-        """
-        Get video file information and metadata (NOT for images!).
-        
-        ⭐ Use ONLY for videos (media_type="video")
-        For images, use get_image_details instead.
-        
-        ⭐ Use this tool when:
-        - User asks for video details
-        - User wants video file information
-        - User says "show me video [NASA_ID]"
-        - NASA ID is from a VIDEO search result
-        
-        ❌ DO NOT use for images - use get_image_details
-        
-        Note: Videos do NOT have /asset endpoint like images.
-        This tool returns metadata which contains video information.
-        
-        Args:
-            nasa_id: NASA ID of the VIDEO (e.g., "NHQ_2021_0222_VF_...")
-            
-        Returns:
-            Video metadata and information
-        """
-        # Try metadata endpoint (videos don't have /asset endpoint)
-        metadata_url = f"https://images-api.nasa.gov/metadata/{nasa_id}"
+    except Exception as e:
+        return {
+            'error': f'Error retrieving video details: {str(e)}',
+            'note': 'Check if the NASA ID is correct and is a video'
+        }
+
+
+async def get_thumbnail(nasa_id: str = "", url: str = "", include_data: bool = False) -> dict:
+    """
+    Get a result's thumbnail from the local blob cache (downloading it once on a miss).
+    
+    ⭐ Use this tool when:
+    - You want to show or inspect the preview image of a search result
+    - Several previews are needed: thumbnails already prefetched after a
+      search cost no network at all
+    
+    Args:
+        nasa_id: NASA ID of the item (its thumbnail is looked up in the asset list)
+        url: Or a thumbnail_url from search results (NASA asset hosts only)
+        include_data: Also return the image bytes base64-encoded (default: path only)
+    
+    Returns:
+        Local file path, size, content type and sha256 of the cached thumbnail,
+        whether it was already cached, and optionally the bytes
+    """
+    if not url and not nasa_id:
+        return {'error': 'Give a nasa_id or a thumbnail url'}
+    try:
+        if not url:
+            url = await thumbnails.thumbnail_url(nasa_id)
+            if not url:
+                return {'nasa_id': nasa_id, 'error': 'No thumbnail listed for this item'}
+        entry = await thumbnails.fetch(url)
+    except ValueError as e:
+        return {'error': str(e)}
+    except httpx.HTTPStatusError as e:
+        return {
+            'nasa_id': nasa_id or None,
+            'error': f'Thumbnail not available: HTTP {e.response.status_code}',
+            'status_code': e.response.status_code
+        }
+    except Exception as e:
+        return {'nasa_id': nasa_id or None, 'error': f'Error retrieving thumbnail: {str(e)}'}
+
+    result = dict(entry, nasa_id=nasa_id or None)
+    if include_data:
+        data = await asyncio.to_thread(_read_file, entry['path'])
+        result['data_base64'] = base64.b64encode(data).decode('ascii')
+    return result
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+async def read_thumbnail(nasa_id: str) -> bytes:
+    """Thumbnail image of a NASA item, served from the local blob cache."""
+    url = await thumbnails.thumbnail_url(nasa_id)
+    if not url:
+        raise ValueError(f"No thumbnail listed for {nasa_id}")
+    entry = await thumbnails.fetch(url)
+    return await asyncio.to_thread(_read_file, entry['path'])
+
+
+async def download_asset(
+    nasa_id: str = "",
+    url: str = "",
+    variant: str = "orig",
+    ctx: Optional[Context] = None
+) -> dict:
+    """
+    Download an item's original-resolution file (or another size) to local disk.
+    
+    Large files (TIFFs, videos of hundreds of MB) are fetched in parallel
+    chunks and never held in memory; an interrupted download resumes where it
+    stopped when called again. Progress is reported while it runs. A download
+    keeps going if the call times out - calling again waits for it.
+    
+    ⭐ Use this tool when:
+    - User wants the actual full-resolution file saved locally, not just its URL
+    - User wants to keep / process a video or a large TIFF offline
+    
+    ⚠️ For previews use get_thumbnail; for file URLs only use get_image_details.
+    
+    Args:
+        nasa_id: NASA ID of the item
+        url: Or a file URL from get_image_details (NASA asset hosts only)
+        variant: With nasa_id - "orig" (default), "large", "medium", "small" or "thumb"
         
-        try:
-            response = requests.get(metadata_url, timeout=10)
-            response.raise_for_status()
-            
-            metadata = response.json()
-            
-            return {
-                'nasa_id': nasa_id,
-                'media_type': 'video',
-                'metadata_url': metadata_url,
-                'metadata': metadata,
-                'note': 'Videos do not have multiple file versions like images. Check NASA website for video player or download options.',
-                'nasa_website': f'https://images.nasa.gov/details/{nasa_id}'
-            }
-            
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                return {
-                    'error': f'Video not found: {nasa_id}',
-                    'note': 'This NASA ID does not exist or is not a video. Try searching for videos first.',
-                    'status_code': 404
-                }
-            else:
-                return {
-                    'error': f'HTTP Error: {e}',
-                    'status_code': e.response.status_code
-                }
-        except Exception as e:
-            return {
-                'error': f'Error retrieving video details: {str(e)}',
-                'note': 'Check if the NASA ID is correct and is a video'
-            }
\ No newline at end of file
+    Returns:
+        Local path, size, whether it was resumed or already complete, and throughput
+    """
+    if not url and not nasa_id:
+        return {'error': 'Give a nasa_id or a file url'}
+    try:
+        if not url:
+            url = await downloader.asset_url(nasa_id, variant)
+            if not url:
+                return {'nasa_id': nasa_id, 'error': f'No {variant} file listed for this item'}
+        if not thumbnails.is_allowed(url):
+            return {'error': f'Not a NASA asset URL: {url}'}
+
+        async def progress(done, total):
+            await ctx.report_progress(
+                progress=done,
+                total=total,
+                message=f'{done / 2 ** 20:,.1f} MB' + (f' of {total / 2 ** 20:,.1f} MB' if total else '')
+            )
+
+        result = await downloader.download(url, progress=progress if ctx is not None else None)
+    except ValueError as e:
+        return {'nasa_id': nasa_id or None, 'error': str(e)}
+    except httpx.HTTPStatusError as e:
+        return {
+            'nasa_id': nasa_id or None,
+            'error': f'File not available: HTTP {e.response.status_code}',
+            'status_code': e.response.status_code
+        }
+    except (resilience.CircuitOpenError, resilience.DeadlineExceeded, httpx.TransportError) as e:
+        return {
+            'nasa_id': nasa_id or None,
+            'error': f'Download interrupted: {str(e)}',
+            'note': 'The partial file is kept; call download_asset again to resume.'
+        }
+    except Exception as e:
+        return {'nasa_id': nasa_id or None, 'error': f'Error downloading file: {str(e)}'}
+
+    return dict(result, nasa_id=nasa_id or None)
+
+
+def register_media_tools(mcp):
+    """Register all media-related tools with the MCP server"""
+    mcp.tool()(get_captions)
+    mcp.tool()(get_caption_cues)
+    mcp.tool()(search_captions)
+    mcp.tool()(get_video_details)
+    mcp.tool()(get_thumbnail)
+    mcp.tool()(download_asset)
+    mcp.resource("nasa://thumbnail/{nasa_id}", mime_type="image/jpeg")(read_thumbnail)
@@ -2,91 +2,445 @@
 NASA Metadata Tools
 Tools for retrieving metadata and asset information
 """
-import requests
+import asyncio
+import json
+import time
+from typing import Optional
 
-def register_metadata_tools(mcp):
-    """Register all metadata-related tools with the MCP server"""
+import httpx
+
+from . import config, nasa_api, rate_limit, tracing
+from .captions import format_cue, format_timestamp
+
+# metadata.json key patterns per profile: exact keys, or prefixes ending in '*'.
+# "full" (None) returns the whole document.
+METADATA_PROFILES = {
+    'full': None,
+    'summary': (
+        'AVAIL:NASAID', 'AVAIL:Title', 'AVAIL:Description', 'AVAIL:Keywords', 'AVAIL:Center',
+        'AVAIL:DateCreated', 'AVAIL:MediaType', 'AVAIL:Photographer', 'AVAIL:Location'
+    ),
+    'camera': (
+        'EXIF:Make', 'EXIF:Model', 'EXIF:LensModel', 'EXIF:Lens', 'EXIF:FNumber', 'EXIF:ExposureTime',
+        'EXIF:ISO', 'EXIF:FocalLength', 'EXIF:DateTimeOriginal', 'EXIF:Software',
+        'File:ImageWidth', 'File:ImageHeight', 'Composite:ImageSize', 'Composite:Megapixels'
+    ),
+    'location': (
+        'AVAIL:Location', 'EXIF:GPS*', 'Composite:GPS*', 'XMP:City', 'XMP:State', 'XMP:Country',
+        'XMP:Location', 'IPTC:City', 'IPTC:Province-State', 'IPTC:Country-PrimaryLocationName'
+    ),
+    'exif': ('EXIF:*',)
+}
+
+
+def classify_file(href: str) -> str:
+    """Determine the file type (Original, Large, ..., Metadata) from an asset URL."""
+    if '~orig' in href:
+        return 'Original'
+    elif '~large' in href:
+        return 'Large'
+    elif '~medium' in href:
+        return 'Medium'
+    elif '~small' in href:
+        return 'Small'
+    elif '~thumb' in href:
+        return 'Thumbnail'
+    elif '.json' in href:
+        return 'Metadata'
+    else:
+        return 'Other'
+
+
+def list_asset_files(asset: dict) -> list:
+    """Turn an /asset manifest into a list of {type, filename, url} dicts."""
+    files = []
+    for item in asset.get('collection', {}).get('items', []):
+        href = item.get('href', '')
+        files.append({
+            'type': classify_file(href),
+            'filename': href.split('/')[-1],
+            'url': href
+        })
+    return files
+
+
+def resolve_metadata_keys(profile: str = "full", keys: Optional[list] = None):
+    """
+    Work out which metadata.json keys to return.
+
+    Explicit keys are added to the profile's patterns; with the "full"
+    profile they replace it.
+
+    Returns:
+        Tuple of key patterns, None for the whole document, or raises
+        ValueError for an unknown profile
+    """
+    if profile not in METADATA_PROFILES:
+        raise ValueError(f"Unknown metadata profile: {profile} (valid: {', '.join(METADATA_PROFILES)})")
+    patterns = METADATA_PROFILES[profile]
+    if not keys:
+        return patterns
+    return tuple(dict.fromkeys((patterns or ()) + tuple(keys)))
+
+
+def project_metadata(document: dict, patterns) -> dict:
+    """
+    Keep only the metadata.json keys matching the patterns (case-insensitive).
+
+    A pattern is an exact key ("EXIF:Make") or a prefix ending in '*'
+    ("EXIF:*", "EXIF:GPS*"). Non-matching values are never copied.
+    """
+    if patterns is None:
+        return document
+    exact = {p.lower() for p in patterns if not p.endswith('*')}
+    prefixes = tuple(p[:-1].lower() for p in patterns if p.endswith('*'))
+    projected = {}
+    for key, value in document.items():
+        lowered = key.lower()
+        if lowered in exact or (prefixes and lowered.startswith(prefixes)):
+            projected[key] = value
+    return projected
+
+
+async def _get_projected_metadata(nasa_id: str, patterns, profile: Optional[str] = None) -> tuple:
+    """
+    Return (metadata_url, projected document) for a nasa_id.
+
+    When profile names a plain profile, its projection is cached on its own,
+    so a repeat "camera" lookup neither re-filters nor re-measures the full
+    document. Custom key lists are filtered from the cached full document.
+    """
+    if profile:
+        cached = nasa_api.metadata_profile_cache.get((nasa_id, profile))
+        if cached is not None:
+            tracing.add_event("cache_hit", cache=nasa_api.metadata_profile_cache.name, key=f"{nasa_id}/{profile}")
+            return cached['metadata_url'], cached['metadata']
+
+    metadata_url, document = await nasa_api.get_metadata_document(nasa_id)
+    if document is None:
+        return None, None
+    projected = project_metadata(document, patterns)
+    if profile:
+        nasa_api.metadata_profile_cache.set(
+            (nasa_id, profile),
+            {'metadata_url': metadata_url, 'metadata': projected},
+            size=len(json.dumps(projected))
+        )
+    return metadata_url, projected
+
+
+async def get_image_details(nasa_id: str) -> dict:
+    """
+    Get detailed file information for a specific NASA media asset.
+    Returns all available file versions (original, large, medium, small, thumbnail).
     
-    @mcp.tool()
-    def get_image_details(nasa_id: str) -> dict:
-        """
-        Get detailed file information for a specific NASA media asset.
-        Returns all available file versions (original, large, medium, small, thumbnail).
-        
-        ⭐ Use this tool when:
-        - User asks "Get details for image [NASA_ID]"
-        - User wants to download/access specific image files
-        - User has a NASA ID and wants all available versions
-        
-        Args:
-            nasa_id: The NASA ID of the media (e.g., "as11-40-5903")
-            
-        Returns:
-            Dictionary with all available file URLs and types
-        """
-        url = f"https://images-api.nasa.gov/asset/{nasa_id}"
-        
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        items = data.get('collection', {}).get('items', [])
+    ⭐ Use this tool when:
+    - User asks "Get details for image [NASA_ID]"
+    - User wants to download/access specific image files
+    - User has a NASA ID and wants all available versions
+    
+    Args:
+        nasa_id: The NASA ID of the media (e.g., "as11-40-5903")
         
-        if not items:
-            return {'error': f'No files found for NASA ID: {nasa_id}'}
+    Returns:
+        Dictionary with all available file URLs and types
+    """
+    data = await nasa_api.get_asset(nasa_id)
+    
+    files = list_asset_files(data)
+    
+    if not files:
+        return {'error': f'No files found for NASA ID: {nasa_id}'}
+    
+    return {
+        'nasa_id': nasa_id,
+        'total_files': len(files),
+        'files': files,
+        'note': 'Use these URLs to download or display the image'
+    }
+
+
+async def get_image_details_many(nasa_ids: list[str]) -> dict:
+    """
+    Get file information for MANY NASA media assets in one call.
+    
+    ⭐ Use this tool when:
+    - You have several NASA IDs (e.g., from search results) and need files for all of them
+    - Instead of calling get_image_details once per ID
+    
+    Manifests are fetched concurrently (bounded) and served from cache when possible.
+    A failure for one ID does not fail the others.
+    
+    Args:
+        nasa_ids: List of NASA IDs (max 100)
         
-        files = []
-        for item in items:
-            href = item.get('href', '')
-            filename = href.split('/')[-1]
-            
-            # Determine file type
-            if '~orig' in href:
-                file_type = 'Original'
-            elif '~large' in href:
-                file_type = 'Large'
-            elif '~medium' in href:
-                file_type = 'Medium'
-            elif '~small' in href:
-                file_type = 'Small'
-            elif '~thumb' in href:
-                file_type = 'Thumbnail'
-            elif '.json' in href:
-                file_type = 'Metadata'
-            else:
-                file_type = 'Other'
-            
-            files.append({
-                'type': file_type,
-                'filename': filename,
-                'url': href
-            })
+    Returns:
+        Per-ID file lists, plus a per-ID error map for IDs that could not be fetched
+    """
+    # Preserve order, drop duplicates and empties
+    unique_ids = list(dict.fromkeys(i.strip() for i in nasa_ids if i and i.strip()))
+    requested = unique_ids[:config.BATCH_MAX_IDS]
+    semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+    
+    async def fetch(nasa_id):
+        async with semaphore:
+            try:
+                with rate_limit.bulk():
+                    asset = await nasa_api.get_asset(nasa_id)
+                files = list_asset_files(asset)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    return nasa_id, None, f'NASA ID not found: {nasa_id}'
+                return nasa_id, None, f'HTTP Error: {e.response.status_code}'
+            except Exception as e:
+                return nasa_id, None, f'Error retrieving files: {str(e)}'
+            if not files:
+                return nasa_id, None, f'No files found for NASA ID: {nasa_id}'
+            return nasa_id, files, None
+    
+    results = {}
+    errors = {}
+    for nasa_id, files, error in await asyncio.gather(*(fetch(i) for i in requested)):
+        if error:
+            errors[nasa_id] = error
+        else:
+            results[nasa_id] = {'total_files': len(files), 'files': files}
+    
+    response = {
+        'requested': len(requested),
+        'succeeded': len(results),
+        'failed': len(errors),
+        'results': results,
+        'errors': errors
+    }
+    if len(unique_ids) > len(requested):
+        response['note'] = f'Only the first {config.BATCH_MAX_IDS} IDs were processed'
+    return response
+
+
+async def get_metadata(
+    nasa_id: str,
+    include_files: bool = False,
+    profile: str = "full",
+    keys: Optional[list[str]] = None
+) -> dict:
+    """
+    Get technical metadata for a NASA media asset.
+    
+    ⭐ Use this tool when:
+    - User wants technical/EXIF data for an image
+    - User asks about camera settings, location, technical details
+    - User wants everything about an item at once (include_files=True)
+    
+    ⚠️ metadata.json can hold hundreds of AVAIL:/EXIF:/XMP: keys. Ask only for
+    what you need with profile= or keys= to keep the response small.
+    
+    The /metadata location pointer is resolved on the server and the final
+    metadata.json document is cached. With include_files the /asset file
+    list is fetched in parallel, so one call costs one round trip of wall time.
+    
+    Args:
+        nasa_id: The NASA ID of the media
+        include_files: Also return all available file versions (like get_image_details)
+        profile: Which keys to return:
+                 - "full" (default): the whole document
+                 - "summary": AVAIL: title, description, keywords, center, date, ...
+                 - "camera": camera, lens, exposure and image size
+                 - "location": GPS and place names
+                 - "exif": every EXIF: key
+        keys: Extra keys to return, exact ("EXIF:Make") or prefix ("XMP:*");
+              with profile="full" only these keys are returned
         
+    Returns:
+        Metadata information including EXIF data, camera info, GPS coordinates, etc.
+    """
+    try:
+        patterns = resolve_metadata_keys(profile, keys)
+    except ValueError as e:
+        return {'error': str(e)}
+
+    cached_profile = profile if patterns is not None and not keys else None
+    fetches = [_get_projected_metadata(nasa_id, patterns, cached_profile)]
+    if include_files:
+        fetches.append(nasa_api.get_asset(nasa_id))
+    metadata_result, *asset_result = await asyncio.gather(*fetches, return_exceptions=True)
+
+    if isinstance(metadata_result, httpx.HTTPStatusError):
+        if metadata_result.response.status_code == 404:
+            return {'error': f'NASA ID not found: {nasa_id}', 'status_code': 404}
         return {
-            'nasa_id': nasa_id,
-            'total_files': len(files),
-            'files': files,
-            'note': 'Use these URLs to download or display the image'
+            'error': f'HTTP Error: {metadata_result}',
+            'status_code': metadata_result.response.status_code
         }
+    if isinstance(metadata_result, Exception):
+        return {'error': f'Error retrieving metadata: {str(metadata_result)}'}
+
+    metadata_url, metadata = metadata_result
+    if metadata is None:
+        return {'error': f'No metadata found for NASA ID: {nasa_id}'}
+
+    response = {
+        'nasa_id': nasa_id,
+        'metadata_url': metadata_url,
+        'metadata': metadata
+    }
+    if patterns is not None:
+        response['returned_keys'] = len(metadata)
+    if include_files:
+        if isinstance(asset_result[0], Exception):
+            response['files_error'] = f'Could not retrieve files: {str(asset_result[0])}'
+        else:
+            files = list_asset_files(asset_result[0])
+            response['total_files'] = len(files)
+            response['files'] = files
+    return response
+
+
+# Parts get_item can fan out to
+ITEM_PARTS = ('metadata', 'files', 'captions')
+
+
+def _describe_error(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        if error.response.status_code == 404:
+            return 'Not found (404)'
+        return f'HTTP Error: {error.response.status_code}'
+    return str(error) or type(error).__name__
+
+
+async def get_item(
+    nasa_id: str,
+    include: Optional[list[str]] = None,
+    media_type: str = "",
+    metadata_profile: str = "summary"
+) -> dict:
+    """
+    Get everything about one NASA item in ONE call: metadata, files and (for videos) captions.
     
-    @mcp.tool()
-    def get_metadata(nasa_id: str) -> dict:
-        """
-        Get technical metadata for a NASA media asset.
-        
-        ⭐ Use this tool when:
-        - User wants technical/EXIF data for an image
-        - User asks about camera settings, location, technical details
-        
-        Args:
-            nasa_id: The NASA ID of the media
-            
-        Returns:
-            Metadata information including EXIF data, camera info, GPS coordinates, etc.
-        """
-        url = f"https://images-api.nasa.gov/metadata/{nasa_id}"
-        
-        response = requests.get(url)
-        response.raise_for_status()
+    ⭐ Use this tool when:
+    - User wants a full description of one image or video
+    - Instead of calling get_metadata + get_image_details / get_video_details + get_captions
+    
+    The needed endpoints run concurrently and the answer is merged into one
+    document, with the latency of every sub-request in timings_ms. By default
+    captions are returned only for videos; pass media_type from the search
+    result to skip the speculative captions request for images.
+    
+    Args:
+        nasa_id: The NASA ID of the media
+        include: Parts to fetch, from "metadata", "files", "captions"
+                 (default: metadata and files, plus captions for videos)
+        media_type: "image", "video" or "audio" if known (optional)
+        metadata_profile: Metadata keys to return: summary (default), camera,
+                          location, exif or full (see get_metadata)
         
-        return response.json()
\ No newline at end of file
+    Returns:
+        Merged item document, per-part errors and per-sub-request timings
+    """
+    if include:
+        unknown = [part for part in include if part not in ITEM_PARTS]
+        if unknown:
+            return {'error': f"Unknown parts: {', '.join(unknown)} (valid: {', '.join(ITEM_PARTS)})"}
+        parts = set(include)
+    else:
+        parts = {'metadata', 'files'}
+    try:
+        patterns = resolve_metadata_keys(metadata_profile)
+    except ValueError as e:
+        return {'error': str(e)}
+
+    media_type = media_type.strip().lower()
+    # With the default parts, captions depend on the media type; without a hint it comes
+    # from metadata.json, so captions are fetched speculatively alongside and dropped
+    # if the item turns out not to be a video
+    captions_if_video = not include and media_type != 'video'
+    speculative_captions = captions_if_video and not media_type
+    if not include and media_type == 'video':
+        parts.add('captions')
+
+    timings = {}
+    started = time.perf_counter()
+
+    async def timed(name, coro):
+        start = time.perf_counter()
+        try:
+            result = await coro
+        except Exception:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            raise
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    tasks = {}
+    if 'metadata' in parts or (captions_if_video and not media_type):
+        tasks['metadata'] = asyncio.create_task(timed('metadata', nasa_api.get_metadata_document(nasa_id)))
+    if 'files' in parts:
+        tasks['files'] = asyncio.create_task(timed('files', nasa_api.get_asset(nasa_id)))
+    if 'captions' in parts or speculative_captions:
+        tasks['captions'] = asyncio.create_task(timed('captions', nasa_api.get_caption_cues(nasa_id)))
+
+    response = {'nasa_id': nasa_id}
+    errors = {}
+    try:
+        if 'metadata' in tasks:
+            try:
+                metadata_url, document = await tasks['metadata']
+            except Exception as e:
+                errors['metadata'] = _describe_error(e)
+            else:
+                if document is None:
+                    errors['metadata'] = 'No metadata available'
+                else:
+                    media_type = media_type or str(document.get('AVAIL:MediaType', '')).lower()
+                    if 'metadata' in parts:
+                        response['metadata_url'] = metadata_url
+                        response['metadata'] = project_metadata(document, patterns)
+            if captions_if_video and media_type == 'video':
+                parts.add('captions')
+        if 'captions' in tasks and 'captions' not in parts:
+            tasks.pop('captions').cancel()
+            timings.pop('captions', None)
+
+        if 'files' in tasks:
+            try:
+                files = list_asset_files(await tasks['files'])
+            except Exception as e:
+                errors['files'] = _describe_error(e)
+            else:
+                response['total_files'] = len(files)
+                response['files'] = files
+
+        if 'captions' in tasks:
+            try:
+                captions = await tasks['captions']
+            except Exception as e:
+                errors['captions'] = _describe_error(e)
+            else:
+                cues = captions['cues']
+                response['captions'] = {
+                    'srt_url': captions['srt_url'],
+                    'cue_count': len(cues),
+                    'duration': format_timestamp(cues[-1]['end']) if cues else None,
+                    'first_cues': [format_cue(cue) for cue in cues[:5]]
+                } if captions['srt_url'] else None
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 2)
+    response['media_type'] = media_type or None
+    response['errors'] = errors
+    response['timings_ms'] = timings
+    # Only the parts the caller gets count; metadata fetched just to learn the media type doesn't
+    requested = [part for part in tasks if part in parts]
+    if requested and all(part in errors for part in requested):
+        response['error'] = f'Could not retrieve NASA ID: {nasa_id}'
+    return response
+
+
+def register_metadata_tools(mcp):
+    """Register all metadata-related tools with the MCP server"""
+    mcp.tool()(get_image_details)
+    mcp.tool()(get_image_details_many)
+    mcp.tool()(get_metadata)
+    mcp.tool()(get_item)
@@ -0,0 +1,374 @@
+"""
+NASA MCP Metrics
+Process-wide counters and latency histograms for tool calls, upstream HTTP
+requests, JSON parsing and result serialization, plus cache hit ratios.
+
+Everything is kept in memory and exposed three ways: the get_metrics tool
+(JSON summary or OpenMetrics text), a GET /metrics route when the server
+runs over http / sse, and an optional OpenMetrics file rewritten every
+NASA_MCP_METRICS_DUMP_INTERVAL seconds (for node_exporter's textfile
+collector or a plain `cat`).
+
+Upstream time is split with httpx's "trace" extension into connect (DNS
+lookup + TCP handshake, which httpcore reports as one step), TLS, TTFB
+(request sent until response headers) and transfer (response body).
+Connect and TLS are only observed when a new connection is opened, so their
+counts also show how often the keep-alive pool missed.
+"""
+import bisect
+import contextlib
+import contextvars
+import math
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from fastmcp.server.middleware import Middleware
+from fastmcp.tools.tool import default_serializer
+
+from . import config
+
+# Seconds; spans a warm cache hit (sub-millisecond) to a slow upstream page
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def items(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def samples(self):
+        for labelvalues, value in self.items():
+            yield "_total", dict(zip(self.labelnames, labelvalues)), value
+
+
+class _Series:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = _Series(len(self.buckets))
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+
+    def items(self) -> list:
+        with self._lock:
+            return sorted(
+                (labelvalues, (list(series.counts), series.sum, series.count))
+                for labelvalues, series in self._series.items()
+            )
+
+    def quantile(self, q: float, counts: list, count: int) -> float:
+        """Estimate the q-quantile in seconds by interpolating inside its bucket."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, in_bucket in enumerate(counts):
+            if seen + in_bucket >= rank and in_bucket:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i >= len(self.buckets):
+                    return lower  # +Inf bucket: the best we can say is "above the last bound"
+                return lower + (self.buckets[i] - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return self.buckets[-1]
+
+    def summary(self, counts: list, total: float, count: int) -> dict:
+        return {
+            'count': count,
+            'avg_ms': round(total / count * 1000, 2) if count else 0.0,
+            'p50_ms': round(self.quantile(0.5, counts, count) * 1000, 2),
+            'p95_ms': round(self.quantile(0.95, counts, count) * 1000, 2),
+            'p99_ms': round(self.quantile(0.99, counts, count) * 1000, 2)
+        }
+
+    def samples(self):
+        for labelvalues, (counts, total, count) in self.items():
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, in_bucket in zip(list(self.buckets) + [math.inf], counts):
+                cumulative += in_bucket
+                yield "_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+TOOL_CALLS = Counter("nasa_mcp_tool_calls", "MCP tool calls", ("tool",))
+TOOL_ERRORS = Counter(
+    "nasa_mcp_tool_errors",
+    "Failed tool calls: kind=exception (raised) or kind=result (returned an 'error' dict)",
+    ("tool", "kind")
+)
+TOOL_DURATION = Histogram(
+    "nasa_mcp_tool_duration_seconds", "Tool call time including result serialization", ("tool",)
+)
+SERIALIZATION = Histogram("nasa_mcp_serialization_seconds", "Time to serialize a tool result to JSON text", ("tool",))
+UPSTREAM_REQUESTS = Counter(
+    "nasa_mcp_upstream_requests", "Upstream HTTP attempts by host and status (or 'error')", ("host", "status")
+)
+UPSTREAM_DURATION = Histogram(
+    "nasa_mcp_upstream_request_duration_seconds",
+    "Upstream attempt time including rate limiter and connection pool waits",
+    ("host",)
+)
+UPSTREAM_PHASE = Histogram(
+    "nasa_mcp_upstream_phase_seconds", "Upstream time per phase: connect, tls, ttfb, transfer", ("host", "phase")
+)
+JSON_PARSE = Histogram("nasa_mcp_json_parse_seconds", "Time to decode upstream JSON bodies", ("host",))
+
+METRICS = (
+    TOOL_CALLS, TOOL_ERRORS, TOOL_DURATION, SERIALIZATION,
+    UPSTREAM_REQUESTS, UPSTREAM_DURATION, UPSTREAM_PHASE, JSON_PARSE
+)
+
+# Callables returning gauge families, see register_collector()
+_collectors = []
+
+
+def register_collector(collector):
+    """
+    Add a callable evaluated at export time.
+
+    It returns a list of (name, documentation, [(labels_dict, value), ...])
+    gauge families - used for values that already live elsewhere, like
+    cache hit ratios.
+    """
+    _collectors.append(collector)
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+# httpcore trace step -> phase; ttfb runs from sending the request headers to receiving the response headers
+_PHASE_STEPS = {
+    'connect_tcp': 'connect',
+    'start_tls': 'tls',
+    'receive_response_body': 'transfer'
+}
+
+
+class UpstreamTimer:
+    """httpx "trace" extension callback recording one request's phases for its host."""
+
+    __slots__ = ('host', '_started')
+
+    def __init__(self, host: str):
+        self.host = host
+        self._started = {}
+
+    async def __call__(self, event: str, info: dict):
+        # e.g. "connection.connect_tcp.started", "http11.receive_response_headers.complete"
+        parts = event.split('.')
+        if len(parts) != 3:
+            return
+        _, step, state = parts
+        now = time.perf_counter()
+        if step == 'send_request_headers':
+            if state == 'started':
+                self._started['ttfb'] = now
+            return
+        phase = 'ttfb' if step == 'receive_response_headers' else _PHASE_STEPS.get(step)
+        if phase is None:
+            return
+        if state == 'started':
+            if phase != 'ttfb':
+                self._started[phase] = now
+        elif state == 'complete' and phase in self._started:
+            UPSTREAM_PHASE.observe(now - self._started.pop(phase), self.host, phase)
+
+
+_current_tool = contextvars.ContextVar("nasa_mcp_current_tool", default=None)
+
+
+def timed_serializer(data) -> str:
+    """FastMCP tool_serializer that records how long each result takes to serialize."""
+    start = time.perf_counter()
+    try:
+        return default_serializer(data)
+    finally:
+        SERIALIZATION.observe(time.perf_counter() - start, _current_tool.get() or "unknown")
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Count and time every tool call, and rewrite the metrics file when it is due."""
+
+    async def on_call_tool(self, context, call_next):
+        tool = context.message.name
+        token = _current_tool.set(tool)
+        start = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            TOOL_ERRORS.inc(tool, "exception")
+            raise
+        else:
+            structured = getattr(result, 'structured_content', None)
+            if isinstance(structured, dict) and structured.get('error'):
+                TOOL_ERRORS.inc(tool, "result")
+            return result
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - start, tool)
+            TOOL_CALLS.inc(tool)
+            _current_tool.reset(token)
+            maybe_dump()
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value)) if isinstance(value, int) else f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def render_openmetrics() -> str:
+    """All metrics in the OpenMetrics text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        for suffix, labels, value in metric.samples():
+            lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    for collector in _collectors:
+        for name, documentation, samples in collector():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"# HELP {name} {_escape(documentation)}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> dict:
+    """JSON-friendly summary: per-tool latency percentiles, upstream phases, parse and serialization time."""
+    tools = {}
+    for (tool,), value in TOOL_CALLS.items():
+        tools[tool] = {'calls': value, 'errors': 0}
+    for (tool, _), value in TOOL_ERRORS.items():
+        tools.setdefault(tool, {'calls': 0, 'errors': 0})['errors'] += value
+    for (tool,), series in TOOL_DURATION.items():
+        latency = TOOL_DURATION.summary(*series)
+        del latency['count']  # same as calls
+        tools.setdefault(tool, {'calls': 0, 'errors': 0}).update(latency)
+    for (tool,), (counts, total, count) in SERIALIZATION.items():
+        if tool in tools:
+            tools[tool]['serialization_avg_ms'] = round(total / count * 1000, 3) if count else 0.0
+
+    upstream = {}
+    for (host, status), value in UPSTREAM_REQUESTS.items():
+        upstream.setdefault(host, {'requests': {}, 'phases': {}})['requests'][status] = value
+    for (host,), series in UPSTREAM_DURATION.items():
+        upstream.setdefault(host, {'requests': {}, 'phases': {}})['total'] = UPSTREAM_DURATION.summary(*series)
+    for (host, phase), series in UPSTREAM_PHASE.items():
+        upstream.setdefault(host, {'requests': {}, 'phases': {}})['phases'][phase] = UPSTREAM_PHASE.summary(*series)
+    json_parse = {host: JSON_PARSE.summary(*series) for (host,), series in JSON_PARSE.items()}
+
+    gauges = {}
+    for collector in _collectors:
+        for name, _, samples in collector():
+            gauges[name] = [dict(labels, value=value) for labels, value in samples]
+
+    return {
+        'tools': dict(sorted(tools.items(), key=lambda item: -item[1]['calls'])),
+        'upstream': upstream,
+        'json_parse': json_parse,
+        'gauges': gauges
+    }
+
+
+_dump_lock = threading.Lock()
+_last_dump = 0.0
+
+
+def dump(path: str = None):
+    """Write the OpenMetrics text to path (default NASA_MCP_METRICS_FILE) atomically."""
+    path = path or config.METRICS_FILE
+    if not path:
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_openmetrics())
+    os.replace(tmp_path, path)
+
+
+def maybe_dump():
+    """Rewrite the metrics file if NASA_MCP_METRICS_FILE is set and the dump interval has passed."""
+    global _last_dump
+    if not config.METRICS_FILE:
+        return
+    now = time.monotonic()
+    if now - _last_dump < config.METRICS_DUMP_INTERVAL or not _dump_lock.acquire(blocking=False):
+        return
+    try:
+        _last_dump = now
+        dump()
+    except OSError:
+        pass  # metrics must never fail a tool call
+    finally:
+        _dump_lock.release()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(server):
+    """FastMCP lifespan writing a final metrics file when the server shuts down."""
+    try:
+        yield {}
+    finally:
+        if config.METRICS_FILE:
+            dump()
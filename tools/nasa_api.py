@@ -0,0 +1,350 @@
+"""
+NASA API Endpoints
+Thin async wrappers around images-api.nasa.gov endpoints shared by the tool modules,
+with response caching in front of the network.
+"""
+import asyncio
+import math
+
+from . import config, http_client, metrics, rate_limit, resilience, tracing
+from .cache import make_cache
+from .captions import parse_srt
+from .local_index import get_index
+from .stream_json import SearchStreamParser
+
+# images-api.nasa.gov refuses to page past the first 10,000 hits of a query
+API_MAX_RESULTS = 10000
+
+search_cache = make_cache(
+    "search",
+    ttl=config.SEARCH_CACHE_TTL,
+    max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=config.SEARCH_CACHE_MAX_BYTES
+)
+
+manifest_cache = make_cache(
+    "manifest",
+    ttl=config.MANIFEST_CACHE_TTL,
+    max_entries=config.MANIFEST_CACHE_MAX_ENTRIES,
+    persist_dir=config.MANIFEST_CACHE_DIR
+)
+
+captions_cache = make_cache(
+    "captions",
+    ttl=config.MANIFEST_CACHE_TTL,
+    max_entries=config.MANIFEST_CACHE_MAX_ENTRIES,
+    max_bytes=config.CAPTIONS_CACHE_MAX_BYTES,
+    persist_dir=config.MANIFEST_CACHE_DIR
+)
+
+# Pre-projected metadata.json documents for the named profiles of get_metadata
+metadata_profile_cache = make_cache(
+    "metadata_profiles",
+    ttl=config.MANIFEST_CACHE_TTL,
+    max_entries=config.MANIFEST_CACHE_MAX_ENTRIES
+)
+
+CACHES = (search_cache, manifest_cache, captions_cache, metadata_profile_cache)
+
+
+def _cache_metrics() -> list:
+    stats = [cache.stats() for cache in CACHES]
+    return [
+        ("nasa_mcp_cache_hit_ratio", "Cache hits / lookups since start",
+         [({'cache': s['name']}, s['hit_ratio']) for s in stats]),
+        ("nasa_mcp_cache_hits", "Cache hits since start", [({'cache': s['name']}, s['hits']) for s in stats]),
+        ("nasa_mcp_cache_misses", "Cache misses since start", [({'cache': s['name']}, s['misses']) for s in stats]),
+        ("nasa_mcp_cache_stale_served", "Stale entries served during upstream failures",
+         [({'cache': s['name']}, s['stale_served']) for s in stats]),
+        ("nasa_mcp_cache_bytes", "Bytes held per cache", [({'cache': s['name']}, s['bytes']) for s in stats])
+    ]
+
+
+metrics.register_collector(_cache_metrics)
+
+
+def _serve_stale(cache, key, error: Exception):
+    """
+    Return an expired cache entry's value when the upstream is down, else re-raise error.
+
+    Used while a request failed for upstream reasons (open circuit breaker,
+    exhausted retries, deadline): a stale answer beats no answer.
+    """
+    entry = cache.get_entry(key) if resilience.is_upstream_failure(error) else None
+    if entry is None:
+        raise error
+    cache.stale_served += 1
+    tracing.add_event("cache_stale", cache=cache.name, key=str(key), error=str(error))
+    return entry.value
+
+
+def normalize_search_params(
+    q: str = "",
+    media_type: str = "",
+    year_start: str = "",
+    year_end: str = "",
+    page: int = 1,
+    page_size: int = 100
+) -> dict:
+    """
+    Canonicalize /search parameters so equivalent queries share a cache entry.
+
+    "Mars  Rover" and "mars rover", or "video,image" and "image, video",
+    normalize to the same parameters. Empty filters are dropped.
+    """
+    params = {"q": " ".join(str(q).lower().split())}
+    media_types = sorted({m.strip().lower() for m in str(media_type).split(",") if m.strip()})
+    if media_types:
+        params["media_type"] = ",".join(media_types)
+    if str(year_start).strip():
+        params["year_start"] = str(year_start).strip()
+    if str(year_end).strip():
+        params["year_end"] = str(year_end).strip()
+    params["page"] = max(int(page or 1), 1)
+    params["page_size"] = int(page_size)
+    return params
+
+
+async def search(cache: bool = True, **kwargs) -> dict:
+    """
+    Run a /search query through the shared cache.
+
+    Accepts the keyword arguments of normalize_search_params and returns the
+    raw decoded response. The returned dict is shared with the cache and must
+    not be mutated. Bulk jobs (harvesting) pass cache=False so they don't
+    evict the entries interactive tools rely on.
+    """
+    params = normalize_search_params(**kwargs)
+    key = tuple(sorted(params.items()))
+
+    if cache:
+        data = search_cache.get(key)
+        if data is not None:
+            tracing.add_event("cache_hit", cache=search_cache.name, key=str(key))
+            return data
+
+    try:
+        response, data = await http_client.afetch(http_client.api_url("/search"), params=params)
+    except Exception as e:
+        if not cache:
+            raise
+        return _serve_stale(search_cache, key, e)
+    if cache:
+        search_cache.set(key, data, size=len(response.content))
+    return data
+
+
+class SearchStream:
+    """
+    Async iterable over the items of one /search page, parsed as bytes arrive.
+
+    Items are slimmed to data[0] and links[0].href. NASA sends
+    collection.metadata after the items, so total_hits is set once
+    iteration has finished. Bypasses the search cache.
+    """
+
+    def __init__(self, **kwargs):
+        self.params = normalize_search_params(**kwargs)
+        self.total_hits = None
+
+    async def __aiter__(self):
+        parser = SearchStreamParser(slim=True)
+        async for chunk in http_client.astream(http_client.api_url("/search"), params=self.params):
+            for item in parser.feed(chunk):
+                yield item
+        parser.close()
+        self.total_hits = parser.metadata.get('total_hits', 0)
+
+
+def stream_search(**kwargs) -> SearchStream:
+    """Stream one /search page item by item (see SearchStream)."""
+    return SearchStream(**kwargs)
+
+
+async def _search_streamed(**kwargs) -> dict:
+    """
+    Fetch one page via the streaming parser, returning a slim /search-shaped dict.
+
+    The page is complete before it is returned (total_hits comes after the
+    items in NASA's response), so this saves memory - no full body or
+    document is held - but does not deliver the first item any earlier. Use
+    stream_search to consume items while the page is still arriving.
+    """
+    stream = SearchStream(**kwargs)
+    items = [item async for item in stream]
+    return {'collection': {'metadata': {'total_hits': stream.total_hits}, 'items': items}}
+
+
+async def iter_search_pages(max_results: int, page_size: int = 100, cache: bool = True, start_page: int = 1,
+                            stream: bool = False, **filters):
+    """
+    Async generator walking /search pages start_page..N until max_results items.
+
+    The first page is fetched alone to learn total_hits; the remaining pages
+    are then prefetched concurrently (bounded by PAGINATION_CONCURRENCY) while
+    pages are yielded in order as soon as each one is available, so callers
+    can stream early pages before the last one arrives.
+
+    Args:
+        max_results: Upper bound on items to yield (capped at API_MAX_RESULTS)
+        page_size: Items per upstream page (1-100)
+        cache: Whether pages go through the search cache
+        start_page: First page to fetch (for resuming an interrupted walk);
+            max_results still counts from page 1
+        stream: Parse pages incrementally into slim items (data[0] and
+            links[0].href only) instead of response.json(); implies no cache.
+            Keeps peak memory low for bulk harvests. Pages are still yielded
+            whole, so this does not make the first items arrive sooner.
+        **filters: q, media_type, year_start, year_end (see normalize_search_params)
+
+    Yields:
+        (page_number, total_hits, items) tuples; items lists are trimmed so the
+        total yielded never exceeds max_results
+    """
+    page_size = max(1, min(page_size, 100))
+    start_page = max(1, start_page)
+
+    async def fetch_page(page):
+        # Multi-page walks yield to interactive tools at the rate limiter
+        with rate_limit.bulk():
+            if stream:
+                return await _search_streamed(page=page, page_size=page_size, **filters)
+            return await search(cache=cache, page=page, page_size=page_size, **filters)
+
+    first = await fetch_page(start_page)
+    total_hits = first['collection']['metadata']['total_hits']
+    target = min(max_results, total_hits, API_MAX_RESULTS)
+    last_page = max(1, math.ceil(target / page_size))
+
+    semaphore = asyncio.Semaphore(config.PAGINATION_CONCURRENCY)
+
+    async def fetch(page):
+        async with semaphore:
+            return await fetch_page(page)
+
+    tasks = [asyncio.create_task(fetch(page)) for page in range(start_page + 1, last_page + 1)]
+    remaining = target - (start_page - 1) * page_size
+    try:
+        items = first['collection']['items'][:max(remaining, 0)]
+        remaining -= len(items)
+        yield start_page, total_hits, items
+        for page, task in enumerate(tasks, start=start_page + 1):
+            if remaining <= 0:
+                break
+            data = await task
+            items = data['collection']['items'][:remaining]
+            if not items:
+                break
+            remaining -= len(items)
+            yield page, total_hits, items
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _get_cached_document(key, url: str) -> dict:
+    """
+    Fetch a JSON document through the long-lived manifest cache.
+
+    Fresh entries are served directly. Stale entries that carry an ETag or
+    Last-Modified validator are revalidated with a conditional GET, so an
+    unchanged document costs a bodiless 304 instead of a full download.
+    If the upstream is unavailable a stale entry is served as is.
+    """
+    entry = manifest_cache.get_entry(key)
+    if entry is not None and entry.fresh:
+        manifest_cache.hits += 1
+        tracing.add_event("cache_hit", cache=manifest_cache.name, key=str(key))
+        return entry.value
+    manifest_cache.misses += 1
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    try:
+        response, data = await http_client.afetch(url, headers=headers or None)
+    except Exception as e:
+        return _serve_stale(manifest_cache, key, e)
+    if response.status_code == 304 and entry is not None:
+        manifest_cache.refresh(key)
+        tracing.add_event("cache_revalidated", cache=manifest_cache.name, key=str(key))
+        return entry.value
+
+    manifest_cache.set(
+        key,
+        data,
+        size=len(response.content),
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified")
+    )
+    return data
+
+
+async def _get_manifest(endpoint: str, nasa_id: str) -> dict:
+    """Fetch /{endpoint}/{nasa_id} through the manifest cache."""
+    return await _get_cached_document((endpoint, nasa_id), http_client.api_url(f"/{endpoint}/{nasa_id}"))
+
+
+async def get_asset(nasa_id: str) -> dict:
+    """Return the /asset manifest (file list) for a nasa_id. Must not be mutated."""
+    return await _get_manifest("asset", nasa_id)
+
+
+async def get_metadata_location(nasa_id: str) -> dict:
+    """Return the /metadata response (metadata.json location) for a nasa_id."""
+    return await _get_manifest("metadata", nasa_id)
+
+
+async def get_metadata_document(nasa_id: str) -> tuple:
+    """
+    Resolve the /metadata location pointer and return (metadata_url, metadata.json document).
+
+    Both the pointer and the document are cached, so a repeat lookup costs
+    no round trip at all. Returns (None, None) if the item has no metadata.
+    Must not be mutated.
+    """
+    location = await get_metadata_location(nasa_id)
+    metadata_url = location.get('location')
+    if not metadata_url:
+        return None, None
+    return metadata_url, await _get_cached_document(("metadata.json", nasa_id), metadata_url)
+
+
+async def get_captions_location(nasa_id: str) -> dict:
+    """Return the /captions response (SRT location) for a video nasa_id."""
+    return await _get_manifest("captions", nasa_id)
+
+
+async def get_caption_cues(nasa_id: str) -> dict:
+    """
+    Return the parsed captions of a video as {'srt_url': ..., 'cues': [...]}.
+
+    Parsed cues are cached per nasa_id, so repeat lookups (other time
+    windows, searches) neither re-download nor re-parse the SRT file, and
+    are added to the local caption index (NASA_MCP_CAPTION_INDEX).
+    Returns {'srt_url': None, 'cues': []} when the video has no captions.
+    """
+    cached = captions_cache.get(nasa_id)
+    if cached is not None:
+        tracing.add_event("cache_hit", cache=captions_cache.name, key=nasa_id)
+        return cached
+
+    try:
+        location = await get_captions_location(nasa_id)
+        srt_url = location.get('location')
+        if not srt_url:
+            return {'srt_url': None, 'cues': []}
+        response, text = await http_client.afetch(srt_url, parse="text")
+    except Exception as e:
+        return _serve_stale(captions_cache, nasa_id, e)
+    parsed = {'srt_url': srt_url, 'cues': parse_srt(text)}
+    captions_cache.set(nasa_id, parsed, size=len(response.content))
+    if config.CAPTION_INDEX:
+        # SQLite write (and index creation on first use) off the event loop
+        await asyncio.to_thread(lambda: get_index(create=True).index_captions(nasa_id, srt_url, parsed['cues']))
+    return parsed
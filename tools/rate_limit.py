@@ -0,0 +1,184 @@
+"""
+NASA Upstream Rate Limiting
+Process-wide governor for requests to NASA: a token bucket caps the request
+rate, an in-flight cap bounds concurrency, and waiting requests are granted
+in priority order so interactive single-item tools overtake bulk work
+(pagination, batch lookups, harvests).
+
+Bulk code marks itself with `with rate_limit.bulk():`; the priority lives in
+a contextvar, so tasks created inside the block inherit it. (Don't hold the
+block across a yield in an async generator - wrap each await instead.)
+"""
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import time
+from collections import deque
+
+from . import config
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+_priority = contextvars.ContextVar("nasa_mcp_request_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def bulk():
+    """Run the enclosed code (and tasks it creates) at bulk priority."""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class Governor:
+    """
+    Token bucket + in-flight cap with strict-priority FIFO queues.
+
+    rate <= 0 disables the token bucket and max_in_flight <= 0 the
+    concurrency cap; with both disabled acquire() never waits.
+    """
+
+    # Recent queueing delays kept per priority for percentiles
+    WINDOW = 1024
+
+    def __init__(self, rate: float, burst: int, max_in_flight: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_in_flight = max_in_flight
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self._refilled_at = time.monotonic()
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._timer = None
+        self._timer_loop = None
+        self._stats = {
+            priority: {'granted': 0, 'delayed': 0, 'total_wait': 0.0, 'max_wait': 0.0,
+                       'recent': deque(maxlen=self.WINDOW)}
+            for priority in PRIORITY_NAMES
+        }
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one upstream request slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, priority: int = None):
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        if not self._waiters and self._try_grant():
+            self._record(priority, 0.0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Granted just as we were cancelled: hand the slot back
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        self._record(priority, time.monotonic() - start)
+
+    def release(self):
+        if self.max_in_flight > 0:
+            self.in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _try_grant(self) -> bool:
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            return False
+        self._refill()
+        if self.rate > 0:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+        if self.max_in_flight > 0:
+            self.in_flight += 1
+        return True
+
+    def _dispatch(self):
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():  # cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_grant():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        # Out of tokens with requests waiting: wake up when the next token is due
+        loop = asyncio.get_running_loop()
+        if self._timer is not None and self._timer_loop is not loop:
+            self._timer = None  # left behind by a previous event loop
+        if self._waiters and self.rate > 0 and self.tokens < 1 and self._timer is None:
+            if self.max_in_flight <= 0 or self.in_flight < self.max_in_flight:
+                delay = (1 - self.tokens) / self.rate
+                self._timer = loop.call_later(delay, self._on_timer)
+                self._timer_loop = loop
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _record(self, priority: int, wait: float):
+        stats = self._stats[priority]
+        stats['granted'] += 1
+        if wait > 0:
+            stats['delayed'] += 1
+        stats['total_wait'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
+        stats['recent'].append(wait)
+
+    def stats(self) -> dict:
+        queues = {}
+        waiting = [0, 0]
+        for priority, _, future in self._waiters:
+            if not future.done():
+                waiting[priority] += 1
+        for priority, name in PRIORITY_NAMES.items():
+            stats = self._stats[priority]
+            recent = sorted(stats['recent'])
+            queues[name] = {
+                'granted': stats['granted'],
+                'delayed': stats['delayed'],
+                'waiting': waiting[priority],
+                'avg_wait_ms': round(stats['total_wait'] / stats['granted'] * 1000, 2) if stats['granted'] else 0.0,
+                'p95_wait_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 2)
+                if recent else 0.0,
+                'max_wait_ms': round(stats['max_wait'] * 1000, 2)
+            }
+        return {
+            'rate_per_second': self.rate,
+            'burst': self.burst,
+            'max_in_flight': self.max_in_flight,
+            'in_flight': self.in_flight,
+            'tokens': round(self.tokens, 2),
+            'queues': queues
+        }
+
+
+governor = Governor(
+    rate=config.RATE_LIMIT_RPS,
+    burst=config.RATE_LIMIT_BURST,
+    max_in_flight=config.MAX_IN_FLIGHT
+)
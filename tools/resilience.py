@@ -0,0 +1,208 @@
+"""
+NASA Upstream Resilience
+Retry with jittered exponential backoff, per-request deadlines and a
+per-host circuit breaker for calls to images-api.nasa.gov and the asset CDN.
+
+Transient failures (connection errors, timeouts, 429 and 5xx) are retried
+until the request's deadline. Repeated failures open the host's breaker,
+after which calls fail fast with CircuitOpenError instead of waiting on a
+degraded upstream; nasa_api then answers from stale cache entries where it
+has them. After NASA_MCP_BREAKER_RESET seconds one trial request is let
+through (half-open) and its outcome closes or re-opens the breaker.
+"""
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import config
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"NASA upstream {host} is unavailable (circuit open), retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request and its retries ran past the overall deadline."""
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for failures worth retrying: transport errors, timeouts, 429 and 5xx."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, httpx.TransportError)
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    """True when the upstream is down or degraded, i.e. stale cached data is a better answer."""
+    return isinstance(error, (CircuitOpenError, DeadlineExceeded)) or is_retryable(error)
+
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    base = config.RETRY_BACKOFF_BASE if base is None else base
+    cap = config.RETRY_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_after(error: Exception):
+    """Seconds from a Retry-After header (delta-seconds form only), or None."""
+    if isinstance(error, httpx.HTTPStatusError):
+        value = error.response.headers.get("Retry-After", "")
+        if value.strip().isdigit():
+            return float(value)
+    return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    closed:    calls pass; failure_threshold consecutive failures open it
+    open:      calls fail fast with CircuitOpenError for reset_timeout seconds
+    half_open: one trial call passes; success closes, failure re-opens
+    """
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go upstream now."""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == 'open' and elapsed >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.host, max(self.reset_timeout - elapsed, 0.0))
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give back a half-open trial slot whose call was cancelled without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'host': self.host,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """Return the circuit breaker for the host of url."""
+    host = urlsplit(url).netloc
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(
+                host,
+                failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=config.BREAKER_RESET
+            )
+        return breaker
+
+
+counters = {'retries': 0, 'deadline_exceeded': 0}
+
+
+async def call(url: str, fn, deadline: float = None):
+    """
+    Run fn() (one upstream attempt for url) with retries, a deadline and the host's breaker.
+
+    Non-retryable errors (e.g. 404) are raised at once and count as a
+    healthy upstream. Retryable ones are retried with jittered backoff,
+    honouring Retry-After, while attempts and time remain.
+
+    Args:
+        url: Request URL, used to pick the host's circuit breaker
+        fn: Zero-argument coroutine function performing one attempt
+        deadline: Overall seconds for all attempts (default NASA_MCP_REQUEST_DEADLINE)
+
+    Raises:
+        CircuitOpenError: The host's breaker is open
+        DeadlineExceeded: The deadline passed before an attempt succeeded
+    """
+    breaker = get_breaker(url)
+    budget = config.REQUEST_DEADLINE if deadline is None else deadline
+    give_up_at = time.monotonic() + budget
+    attempt = 0
+    while True:
+        breaker.allow()
+        remaining = give_up_at - time.monotonic()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=remaining)
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            counters['deadline_exceeded'] += 1
+            raise DeadlineExceeded(f"No response from {breaker.host} within {budget:g}s") from None
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            attempt += 1
+            delay = _retry_after(e)
+            delay = backoff_delay(attempt - 1) if delay is None else delay
+            if attempt >= config.RETRY_ATTEMPTS or time.monotonic() + delay >= give_up_at:
+                raise
+            counters['retries'] += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+def stats() -> dict:
+    with _breakers_lock:
+        breakers = [breaker.stats() for breaker in _breakers.values()]
+    return dict(counters, breakers=breakers)
@@ -2,116 +2,317 @@
 NASA Search Tools
 All tools related to searching NASA's image/video library
 """
-import requests
+import asyncio
 from typing import Optional
 
-def register_search_tools(mcp):
-    """Register all search-related tools with the MCP server"""
+from fastmcp import Context
+
+from . import config, nasa_api, thumbnails
+from .local_index import get_index
+
+SEARCH_MODES = ("live", "prefer_local", "offline")
+
+# Fields a search result can carry, with the value used when NASA omits one
+SEARCH_FIELDS = {
+    'title': 'Untitled',
+    'nasa_id': None,
+    'description': '',
+    'date_created': '',
+    'media_type': 'image',
+    'thumbnail_url': None,
+    'keywords': [],
+    'center': ''
+}
+
+# detail= levels: fields returned and the description length cap (None = uncut)
+DETAIL_LEVELS = {
+    'summary': (('title', 'nasa_id', 'date_created', 'media_type'), None),
+    'truncated': (('title', 'nasa_id', 'description', 'date_created', 'media_type', 'thumbnail_url'), 200),
+    'full': (('title', 'nasa_id', 'description', 'date_created', 'media_type', 'thumbnail_url'), None)
+}
+
+
+def resolve_projection(detail: str = "full", fields: Optional[list] = None) -> tuple:
+    """
+    Work out which result fields to build and how long descriptions may be.
+
+    Explicit fields override the field set of the detail level, while the
+    level's description cap still applies ("truncated" + fields=[...]).
+
+    Returns:
+        (fields, max_description) or raises ValueError for unknown names
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown detail level: {detail} (valid: {', '.join(DETAIL_LEVELS)})")
+    level_fields, max_description = DETAIL_LEVELS[detail]
+    if not fields:
+        return level_fields, max_description
+    unknown = [f for f in fields if f not in SEARCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (valid: {', '.join(SEARCH_FIELDS)})")
+    return tuple(dict.fromkeys(fields)), max_description
+
+
+def _truncate(text: str, max_chars: Optional[int]) -> str:
+    if max_chars and len(text) > max_chars:
+        return text[:max_chars].rstrip() + '…'
+    return text
+
+
+def format_search_item(item: dict, fields: tuple = DETAIL_LEVELS['full'][0], max_description: Optional[int] = None) -> dict:
+    """
+    Flatten one /search collection item into a result dict.
+
+    Only the requested fields are read from the upstream item, so unused
+    (often multi-KB) values are never copied into the result.
+    """
+    item_data = item['data'][0]
+    result = {}
+    for field in fields:
+        if field == 'thumbnail_url':
+            result[field] = item['links'][0]['href'] if 'links' in item else None
+        elif field == 'description':
+            result[field] = _truncate(item_data.get('description', ''), max_description)
+        else:
+            result[field] = item_data.get(field, SEARCH_FIELDS[field])
+    return result
+
+
+def project_result(result: dict, fields: tuple, max_description: Optional[int] = None) -> dict:
+    """Apply a field projection to an already flattened result (local index rows)."""
+    projected = {}
+    for field in fields:
+        value = result.get(field, SEARCH_FIELDS[field])
+        projected[field] = _truncate(value, max_description) if field == 'description' else value
+    return projected
+
+
+async def search_nasa_images(
+    query: str,
+    media_type: str = "image",
+    year_start: str = "",
+    year_end: str = "",
+    page_size: int = 10,
+    page: int = 1,
+    mode: str = "live",
+    detail: str = "full",
+    fields: Optional[list[str]] = None
+) -> dict:
+    """
+    Search NASA's COMPLETE image and video library by ANY keywords.
     
-    @mcp.tool()
-    def search_nasa_images(
-        query: str,
-        media_type: str = "image",
-        year_start: str = "",
-        year_end: str = "",
-        page_size: int = 10
-    ) -> dict:
-        """
-        Search NASA's COMPLETE image and video library by ANY keywords.
-        
-        ⭐ Use this tool when user wants to SEARCH for:
-        - Any space topic: Mars, Jupiter, Saturn, nebulae, etc.
-        - Specific missions: Voyager, Cassini, New Horizons, etc.
-        - Celestial objects: planets, stars, galaxies, asteroids
-        - Space phenomena: supernovas, black holes, eclipses
-        - Any keyword search request
-        
-        ⚠️ DO NOT use this tool when:
-        - User asks about "famous" or "iconic" images → use get_famous_nasa_images
-        - User asks specifically about "Apollo 11 archives" → use get_apollo11_resources
-        - User provides a specific NASA ID → use get_image_details
-        
-        This searches NASA's ENTIRE database (millions of items).
-        
-        Args:
-            query: Search keywords (e.g., "mars rover", "jupiter", "hubble")
-            media_type: Type - "image", "video", or "audio"
-            year_start: Optional start year (e.g., "2000")
-            year_end: Optional end year (e.g., "2024")
-            page_size: Number of results (1-100, default 10)
-            
-        Returns:
-            Live search results from NASA's complete database
-        """
-        url = "https://images-api.nasa.gov/search"
-        
-        params = {
-            "q": query,
-            "media_type": media_type,
-            "page_size": min(page_size, 100)
-        }
-        
-        if year_start:
-            params["year_start"] = year_start
-        if year_end:
-            params["year_end"] = year_end
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        items = data['collection']['items']
-        total_hits = data['collection']['metadata']['total_hits']
-        
-        results = []
-        for item in items:
-            item_data = item['data'][0]
-            results.append({
-                'title': item_data.get('title', 'Untitled'),
-                'nasa_id': item_data.get('nasa_id'),
-                'description': item_data.get('description', ''),
-                'date_created': item_data.get('date_created', ''),
-                'media_type': item_data.get('media_type', 'image'),
-                'thumbnail_url': item['links'][0]['href'] if 'links' in item else None
-            })
-        
-        return {
-            'query': query,
-            'total_hits': total_hits,
-            'returned_results': len(results),
-            'results': results,
-            'note': f'Searched NASA\'s complete database. Found {total_hits:,} total items.'
-        }
-    
-    @mcp.tool()
-    def search_apollo11_specific(
-        query: str = "",
-        page_size: int = 10
-    ) -> dict:
-        """
-        Quick search focused on Apollo 11 mission images.
-        
-        ⭐ Use this tool when user wants:
-        - Quick Apollo 11 image search with keywords
-        - "Search for Apollo 11 moon landing"
-        - "Find Apollo 11 photos of [specific thing]"
+    ⭐ Use this tool when user wants to SEARCH for:
+    - Any space topic: Mars, Jupiter, Saturn, nebulae, etc.
+    - Specific missions: Voyager, Cassini, New Horizons, etc.
+    - Celestial objects: planets, stars, galaxies, asteroids
+    - Space phenomena: supernovas, black holes, eclipses
+    - Any keyword search request
+    
+    ⚠️ DO NOT use this tool when:
+    - User asks about "famous" or "iconic" images → use get_famous_nasa_images
+    - User asks specifically about "Apollo 11 archives" → use get_apollo11_resources
+    - User provides a specific NASA ID → use get_image_details
+    
+    This searches NASA's ENTIRE database (millions of items).
+    
+    Args:
+        query: Search keywords (e.g., "mars rover", "jupiter", "hubble")
+        media_type: Type - "image", "video", or "audio"
+        year_start: Optional start year (e.g., "2000")
+        year_end: Optional end year (e.g., "2024")
+        page_size: Number of results (1-100, default 10)
+        page: Result page to return (default 1)
+        mode: "live" (default) queries NASA; "prefer_local" answers from the
+              local harvested index and falls back to live on a miss;
+              "offline" answers from the local index only
+        detail: "summary" (title, id, date, type), "truncated" (adds a 200-char
+                description and thumbnail) or "full" (default) - use "summary"
+                or "truncated" for large pages to keep the response small
+        fields: Optional explicit list of fields to return, from: title, nasa_id,
+                description, date_created, media_type, thumbnail_url, keywords, center
         
-        For comprehensive Apollo 11 archives, use get_apollo11_resources instead.
-        For general space searches, use search_nasa_images.
+    Returns:
+        Live search results from NASA's complete database
+    """
+    if mode not in SEARCH_MODES:
+        return {'error': f'Unknown mode: {mode}', 'valid_modes': list(SEARCH_MODES)}
+    try:
+        projection = resolve_projection(detail, fields)
+    except ValueError as e:
+        return {'error': str(e)}
+    
+    if mode != "live":
+        # The whole lookup runs in a thread; it may wait on the index lock held by a caption write
+        local = await asyncio.to_thread(
+            _search_local, query, media_type, year_start, year_end, page_size, page, projection
+        )
+        if local is not None and (local.get('error') or local['returned_results'] or mode == "offline"):
+            return local
+        if mode == "offline":
+            return {
+                'query': query,
+                'error': 'Local index not available - run: python -m tools.harvester --query "..."',
+                'source': 'local_index'
+            }
+    
+    data = await nasa_api.search(
+        q=query,
+        media_type=media_type,
+        year_start=year_start,
+        year_end=year_end,
+        page=page,
+        page_size=min(page_size, 100)
+    )
+    
+    items = data['collection']['items']
+    total_hits = data['collection']['metadata']['total_hits']
+    
+    results = [format_search_item(item, *projection) for item in items]
+    if config.THUMBNAIL_PREFETCH:
+        thumbnails.prefetch(thumbnails.search_thumbnail_urls(items))
+    
+    return {
+        'query': query,
+        'page': page,
+        'total_hits': total_hits,
+        'returned_results': len(results),
+        'results': results,
+        'note': f'Searched NASA\'s complete database. Found {total_hits:,} total items.'
+    }
+
+
+def _search_local(query, media_type, year_start, year_end, page_size, page, projection):
+    """Answer a search from the local index, or return None if no items have been harvested."""
+    for name, year in (('year_start', year_start), ('year_end', year_end)):
+        if str(year).strip() and not str(year).strip().isdigit():
+            return {'query': query, 'error': f'Invalid {name}: {year!r} (expected a year like "1969")'}
+    # get_captions creates the index file for the caption index, so an
+    # index without items means nothing was harvested yet
+    index = get_index()
+    if index is None or not index.has_items():
+        return None
+    page_size = max(1, min(page_size, 100))
+    total_hits, results = index.search(
+        query,
+        media_type=media_type,
+        year_start=year_start,
+        year_end=year_end,
+        limit=page_size,
+        offset=(max(page, 1) - 1) * page_size
+    )
+    return {
+        'query': query,
+        'page': page,
+        'total_hits': total_hits,
+        'returned_results': len(results),
+        'results': [project_result(row, *projection) for row in results],
+        'source': 'local_index',
+        'note': f'Answered from the local index. Found {total_hits:,} matching items.'
+    }
+
+
+async def search_nasa_images_all(
+    query: str,
+    media_type: str = "image",
+    year_start: str = "",
+    year_end: str = "",
+    max_results: int = 200,
+    detail: str = "full",
+    fields: Optional[list[str]] = None,
+    ctx: Optional[Context] = None
+) -> dict:
+    """
+    Search NASA's library and collect results ACROSS MULTIPLE PAGES.
+    
+    ⭐ Use this tool when:
+    - User wants MORE than 100 results for one query
+    - User asks for "all" or "every" item matching a search
+    
+    For a quick look at the top hits, use search_nasa_images instead.
+    Pages are fetched concurrently; progress is reported as each page arrives.
+    
+    Args:
+        query: Search keywords (e.g., "apollo 11")
+        media_type: Type - "image", "video", or "audio"
+        year_start: Optional start year (e.g., "1969")
+        year_end: Optional end year (e.g., "1972")
+        max_results: Maximum number of results to collect (default 200, max 1000)
+        detail: "summary", "truncated" or "full" (default) - see search_nasa_images
+        fields: Optional explicit list of fields to return - see search_nasa_images
         
-        Args:
-            query: Additional keywords (optional, e.g., "lunar module", "armstrong")
-            page_size: Number of results (default 10, max 100)
-            
-        Returns:
-            Apollo 11 specific search results (1969-1972)
-        """
-        search_query = f"apollo 11 {query}".strip()
+    Returns:
+        Combined results from all fetched pages
+    """
+    try:
+        projection = resolve_projection(detail, fields)
+    except ValueError as e:
+        return {'error': str(e)}
+    max_results = max(1, min(max_results, config.PAGINATION_MAX_RESULTS))
+    results = []
+    total_hits = 0
+    pages = 0
+    
+    async for page, total_hits, items in nasa_api.iter_search_pages(
+        max_results,
+        q=query,
+        media_type=media_type,
+        year_start=year_start,
+        year_end=year_end
+    ):
+        results.extend(format_search_item(item, *projection) for item in items)
+        pages = page
+        if ctx is not None:
+            await ctx.report_progress(
+                progress=len(results),
+                total=min(max_results, total_hits, nasa_api.API_MAX_RESULTS),
+                message=f'Page {page}: {len(results)} results'
+            )
+    
+    return {
+        'query': query,
+        'total_hits': total_hits,
+        'pages_fetched': pages,
+        'returned_results': len(results),
+        'results': results,
+        'note': f'Collected {len(results):,} of {total_hits:,} total items across {pages} page(s).'
+    }
+
+
+async def search_apollo11_specific(
+    query: str = "",
+    page_size: int = 10
+) -> dict:
+    """
+    Quick search focused on Apollo 11 mission images.
+    
+    ⭐ Use this tool when user wants:
+    - Quick Apollo 11 image search with keywords
+    - "Search for Apollo 11 moon landing"
+    - "Find Apollo 11 photos of [specific thing]"
+    
+    For comprehensive Apollo 11 archives, use get_apollo11_resources instead.
+    For general space searches, use search_nasa_images.
+    
+    Args:
+        query: Additional keywords (optional, e.g., "lunar module", "armstrong")
+        page_size: Number of results (default 10, max 100)
         
-        return search_nasa_images(
-            query=search_query,
-            media_type="image",
-            year_start="1969",
-            year_end="1972",
-            page_size=page_size
-        )
\ No newline at end of file
+    Returns:
+        Apollo 11 specific search results (1969-1972)
+    """
+    search_query = f"apollo 11 {query}".strip()
+    
+    return await search_nasa_images(
+        query=search_query,
+        media_type="image",
+        year_start="1969",
+        year_end="1972",
+        page_size=page_size
+    )
+
+
+def register_search_tools(mcp):
+    """Register all search-related tools with the MCP server"""
+    mcp.tool()(search_nasa_images)
+    mcp.tool()(search_nasa_images_all)
+    mcp.tool()(search_apollo11_specific)
@@ -0,0 +1,175 @@
+"""
+NASA Streaming Search Parser
+Incremental parser for /search responses that yields collection.items[*]
+as soon as each item's bytes have arrived, instead of materializing the
+whole document with response.json().
+
+The outer structure ({"collection": {..., "items": [...]}}) is walked by a
+small state machine; every value (each item, metadata, links) is decoded
+with json's C-accelerated raw_decode, so there is no per-character Python
+loop. Only the current network chunk plus one partial item is buffered.
+"""
+import codecs
+import json
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _NeedMore(Exception):
+    """Raised internally when the buffer ends mid-token."""
+
+
+def slim_item(item: dict) -> dict:
+    """Reduce a /search item to data[0] and links[0].href, dropping everything else."""
+    slim = {'data': [(item.get('data') or [{}])[0]]}
+    links = item.get('links')
+    if links:
+        slim['links'] = [{'href': links[0].get('href')}]
+    return slim
+
+
+class SearchStreamParser:
+    """
+    Feed raw response bytes; collect items as they complete.
+
+    Usage:
+        parser = SearchStreamParser()
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...
+        parser.close()
+        parser.metadata  # {'total_hits': ...}
+    """
+
+    # Compact the buffer once this many characters have been consumed
+    COMPACT_AT = 64 * 1024
+
+    def __init__(self, slim: bool = True):
+        self.slim = slim
+        self.metadata = {}
+        self.collection = {}
+        self.items_seen = 0
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ""
+        self._pos = 0
+        self._state = 'root_open'
+
+    def feed(self, chunk: bytes) -> list:
+        """Consume a chunk of the response body and return newly completed items."""
+        self._buf += self._text.decode(chunk)
+        items = []
+        try:
+            self._run(items)
+        except _NeedMore:
+            pass
+        if self._pos >= self.COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        return items
+
+    def close(self):
+        """Finish parsing; raises ValueError if the document was truncated or malformed."""
+        self._buf += self._text.decode(b"", final=True)
+        try:
+            self._run([])
+        except _NeedMore:
+            pass
+        if self._state != 'done':
+            raise ValueError(f"Incomplete /search response (parser stopped in state {self._state!r})")
+
+    # -- internals -------------------------------------------------------
+
+    def _skip_ws(self):
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        if pos >= len(buf):
+            raise _NeedMore
+
+    def _expect(self, char: str):
+        self._skip_ws()
+        if self._buf[self._pos] != char:
+            raise ValueError(f"Expected {char!r} at offset {self._pos}, got {self._buf[self._pos]!r}")
+        self._pos += 1
+
+    def _value(self):
+        """Decode one complete JSON value at the cursor, or signal that more data is needed."""
+        self._skip_ws()
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            raise _NeedMore
+        # A number at the very end of the buffer may still be growing ("12" -> "1234")
+        if end >= len(self._buf) and not isinstance(value, (dict, list, str)):
+            raise _NeedMore
+        self._pos = end
+        return value
+
+    def _key(self):
+        """Read '"key":' (after an optional comma) and return the key, or None at '}'."""
+        self._skip_ws()
+        if self._buf[self._pos] == ',':
+            self._pos += 1
+            self._skip_ws()
+        if self._buf[self._pos] == '}':
+            self._pos += 1
+            return None
+        key = self._value()
+        self._expect(':')
+        return key
+
+    def _run(self, items: list):
+        while self._state != 'done':
+            start = self._pos
+            try:
+                self._step(items)
+            except _NeedMore:
+                self._pos = start
+                raise
+
+    def _step(self, items: list):
+        state = self._state
+        if state == 'root_open':
+            self._expect('{')
+            self._state = 'root_key'
+        elif state == 'root_key':
+            key = self._key()
+            if key is None:
+                self._state = 'done'
+            elif key == 'collection':
+                self._state = 'collection_open'
+            else:
+                self._value()
+        elif state == 'collection_open':
+            self._expect('{')
+            self._state = 'collection_key'
+        elif state == 'collection_key':
+            key = self._key()
+            if key is None:
+                self._state = 'root_key'
+            elif key == 'items':
+                self._state = 'items_open'
+            else:
+                value = self._value()
+                self.collection[key] = value
+                if key == 'metadata' and isinstance(value, dict):
+                    self.metadata = value
+        elif state == 'items_open':
+            self._expect('[')
+            self._state = 'items_next'
+        elif state == 'items_next':
+            self._skip_ws()
+            char = self._buf[self._pos]
+            if char == ',':
+                self._pos += 1
+                self._skip_ws()
+                char = self._buf[self._pos]
+            if char == ']':
+                self._pos += 1
+                self._state = 'collection_key'
+                return
+            item = self._value()
+            self.items_seen += 1
+            items.append(slim_item(item) if self.slim else item)
@@ -0,0 +1,146 @@
+"""
+NASA Thumbnail Prefetch
+Fetches result thumbnails into the content-addressed blob cache
+(tools/blob_cache.py), so previews are read from local disk instead of
+being downloaded from images-assets.nasa.gov one by one.
+
+search_nasa_images hands each result page to prefetch() when
+NASA_MCP_THUMBNAIL_PREFETCH=1; the downloads run as a background task at
+bulk priority, so they never delay interactive requests. get_thumbnail and
+the nasa://thumbnail/{nasa_id} resource then serve the cached bytes (or
+fetch-and-cache on a miss).
+"""
+import asyncio
+from urllib.parse import urlsplit
+
+from . import config, http_client, metrics, nasa_api, rate_limit
+from .blob_cache import BlobCache
+from .metadata_tools import list_asset_files
+
+_blob_cache = None
+
+# URLs being fetched right now, and the background prefetch tasks (kept
+# referenced so they are not garbage collected mid-flight)
+_pending = set()
+_tasks = set()
+
+counters = {'scheduled': 0, 'fetched': 0, 'already_cached': 0, 'failed': 0}
+
+
+def get_blob_cache() -> BlobCache:
+    """Return the process-wide blob cache, opening it on first use."""
+    global _blob_cache
+    if _blob_cache is None:
+        _blob_cache = BlobCache(config.BLOB_CACHE_DIR, config.BLOB_CACHE_MAX_BYTES, name="thumbnails")
+    return _blob_cache
+
+
+def is_allowed(url: str) -> bool:
+    """Only NASA asset hosts (and the configured API host) are fetched."""
+    parts = urlsplit(url or "")
+    return parts.scheme in ("http", "https") and (
+        parts.netloc in config.ASSET_HOSTS or parts.netloc == urlsplit(config.API_BASE).netloc
+    )
+
+
+async def fetch(url: str) -> dict:
+    """
+    Return the blob cache entry for url, downloading it on a miss.
+
+    Returns:
+        {'url', 'sha256', 'size', 'content_type', 'path', 'cached'} where
+        cached tells whether the bytes were already on disk
+
+    Raises:
+        ValueError: If url is not on a NASA asset host
+    """
+    if not is_allowed(url):
+        raise ValueError(f"Not a NASA asset URL: {url}")
+    cache = get_blob_cache()
+    # Off the event loop: a background put may hold the cache lock while it evicts
+    entry = await asyncio.to_thread(cache.get, url)
+    if entry is not None:
+        return dict(entry, cached=True)
+    response, data = await http_client.afetch(url, parse="bytes")
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip() or None
+    entry = await asyncio.to_thread(cache.put, url, data, content_type)
+    return dict(entry, cached=False)
+
+
+async def thumbnail_url(nasa_id: str):
+    """Thumbnail URL of an item from its (cached) /asset manifest, or None."""
+    asset = await nasa_api.get_asset(nasa_id)
+    for file in list_asset_files(asset):
+        if file['type'] == 'Thumbnail':
+            return file['url']
+    return None
+
+
+def search_thumbnail_urls(items: list) -> list:
+    """Thumbnail URLs of raw /search items (the preview link each result carries)."""
+    return [item['links'][0]['href'] for item in items if item.get('links')]
+
+
+def prefetch(urls: list) -> int:
+    """
+    Start fetching the uncached urls in the background; returns how many were handed over.
+
+    Must be called from a running event loop. URLs already being fetched
+    are skipped here; the background task then skips the ones already
+    cached, so the caller never waits on the blob cache index.
+    """
+    wanted = [url for url in dict.fromkeys(urls) if is_allowed(url) and url not in _pending]
+    if not wanted:
+        return 0
+    _pending.update(wanted)
+    task = asyncio.get_running_loop().create_task(_prefetch(wanted))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return len(wanted)
+
+
+async def _prefetch(urls: list):
+    cache = get_blob_cache()
+    try:
+        cached = await asyncio.to_thread(lambda: {url for url in urls if url in cache})
+    except Exception:
+        cached = set()  # fetch() looks every url up again anyway
+    _pending.difference_update(cached)
+    counters['already_cached'] += len(cached)
+    urls = [url for url in urls if url not in cached]
+    counters['scheduled'] += len(urls)
+    semaphore = asyncio.Semaphore(max(config.THUMBNAIL_PREFETCH_CONCURRENCY, 1))
+
+    async def one(url):
+        async with semaphore:
+            try:
+                await fetch(url)
+                counters['fetched'] += 1
+            except Exception:
+                counters['failed'] += 1  # a missing preview is not worth surfacing
+            finally:
+                _pending.discard(url)
+
+    with rate_limit.bulk():
+        await asyncio.gather(*(one(url) for url in urls))
+
+
+def stats() -> dict:
+    return dict(
+        get_blob_cache().stats(),
+        prefetch=dict(counters, enabled=bool(config.THUMBNAIL_PREFETCH), in_flight=len(_pending))
+    )
+
+
+def _blob_metrics() -> list:
+    if _blob_cache is None:
+        return []
+    stats = _blob_cache.stats()
+    return [
+        ("nasa_mcp_blob_cache_hit_ratio", "Thumbnail blob cache hits / lookups", [({}, stats['hit_ratio'])]),
+        ("nasa_mcp_blob_cache_bytes", "Bytes stored in the thumbnail blob cache", [({}, stats['bytes'])]),
+        ("nasa_mcp_thumbnails_prefetched", "Thumbnails fetched in the background", [({}, counters['fetched'])])
+    ]
+
+
+metrics.register_collector(_blob_metrics)
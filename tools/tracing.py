@@ -0,0 +1,238 @@
+"""
+NASA MCP Tracing
+OpenTelemetry-style spans for every tool call and every upstream HTTP
+request, so a slow agent run can be read back as a timeline: which tool
+calls ran, in what order and overlapping how, which upstream requests each
+one made and which lookups were answered from cache.
+
+Each tool call starts a trace; upstream requests made while it runs (even
+from tasks it gathers) become child spans through a contextvar. Cache hits,
+revalidations, stale answers and coalesced requests are recorded as span
+events. Finished spans go to an in-memory ring buffer (read by the
+get_trace tool) and, with NASA_MCP_TRACE_FILE set, are appended to a JSONL
+file, one span per line.
+
+Tracing is off unless NASA_MCP_TRACING=1 or NASA_MCP_TRACE_FILE is set.
+Disabled, span() returns a shared no-op object and add_event() returns at
+once, so instrumented code pays one attribute check per call.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from fastmcp.server.middleware import Middleware
+
+from . import config
+
+enabled = bool(config.TRACING or config.TRACE_FILE)
+
+# Tool arguments copied onto the tool call span
+TRACED_ARGUMENTS = ('query', 'nasa_id', 'nasa_ids', 'media_type', 'page', 'profile', 'mode')
+
+_current = contextvars.ContextVar("nasa_mcp_current_span", default=None)
+
+_buffer = deque(maxlen=max(config.TRACE_BUFFER, 1))
+_file_lock = threading.Lock()
+_file = None
+spans_recorded = 0
+
+
+class Span:
+    """One timed operation; use as a context manager (or start() / end() for a detached span)."""
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes', 'events', 'status',
+                 'start_time', 'duration', '_started', '_token')
+
+    def __init__(self, name: str, attributes: dict):
+        parent = _current.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = os.urandom(8).hex()
+        self.attributes = {key: value for key, value in attributes.items() if value not in (None, "")}
+        self.events = []
+        self.status = 'ok'
+        self.start_time = 0.0
+        self.duration = 0.0
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_error(self, message: str):
+        self.status = 'error'
+        self.attributes['error'] = message
+
+    def start(self):
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def end(self, exc: BaseException = None):
+        self.duration = time.perf_counter() - self._started
+        if exc is not None:
+            if isinstance(exc, Exception):
+                self.set_error(f"{type(exc).__name__}: {exc}")
+            else:
+                self.status = 'cancelled'
+        _export(self)
+
+    def __enter__(self):
+        self.start()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': round(self.start_time, 6),
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'attributes': self.attributes,
+            'events': self.events
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned by span() while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+    def start(self):
+        return self
+
+    def end(self, exc=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Start a span (child of the current one, if any); a no-op while tracing is disabled."""
+    if not enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def start_span(name: str, **attributes):
+    """
+    Start a span without making it current; the caller must call end().
+
+    For work that spans yields of an async generator, where a context
+    manager would leak the span into the consumer's context.
+    """
+    if not enabled:
+        return _NOOP
+    return Span(name, attributes).start()
+
+
+def add_event(name: str, **attributes):
+    """Record a timestamped event (e.g. a cache hit) on the current span."""
+    if not enabled:
+        return
+    current = _current.get()
+    if current is not None:
+        attributes['offset_ms'] = round((time.perf_counter() - current._started) * 1000, 3)
+        current.events.append(dict(attributes, name=name))
+
+
+def _export(finished: Span):
+    global _file, spans_recorded
+    record = finished.to_dict()
+    _buffer.append(record)
+    spans_recorded += 1
+    if not config.TRACE_FILE:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _file_lock:
+        try:
+            if _file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(config.TRACE_FILE)), exist_ok=True)
+                _file = open(config.TRACE_FILE, 'a', encoding='utf-8')
+            _file.write(line)
+            _file.flush()
+        except OSError:
+            pass  # tracing must never fail a tool call
+
+
+def recent_traces(limit: int = 20, tool: str = "", trace_id: str = "") -> list:
+    """
+    Group the buffered spans into traces, newest first.
+
+    Span start times are given as offsets from their trace's first span so
+    the order and overlap of requests can be read off directly.
+    """
+    traces = {}
+    for record in list(_buffer):
+        traces.setdefault(record['trace_id'], []).append(record)
+
+    result = []
+    for tid, spans in traces.items():
+        if trace_id and tid != trace_id:
+            continue
+        root = next((s for s in spans if s['parent_id'] is None), None)
+        if tool and (root is None or root['attributes'].get('tool') != tool):
+            continue
+        start = min(s['start_time'] for s in spans)
+        end = max(s['start_time'] + s['duration_ms'] / 1000 for s in spans)
+        result.append({
+            'trace_id': tid,
+            'name': root['name'] if root else spans[0]['name'],
+            'start_time': start,
+            'duration_ms': round((end - start) * 1000, 3),
+            'complete': root is not None,
+            'spans': [
+                dict(
+                    {key: value for key, value in s.items() if key not in ('trace_id', 'start_time')},
+                    start_offset_ms=round((s['start_time'] - start) * 1000, 3)
+                )
+                for s in sorted(spans, key=lambda s: s['start_time'])
+            ]
+        })
+    result.sort(key=lambda t: t['start_time'], reverse=True)
+    return result[:limit]
+
+
+def clear():
+    _buffer.clear()
+
+
+class TracingMiddleware(Middleware):
+    """Open a root span for every tool call, tagged with its query / nasa_id arguments."""
+
+    async def on_call_tool(self, context, call_next):
+        if not enabled:
+            return await call_next(context)
+        arguments = context.message.arguments or {}
+        attributes = {key: arguments[key] for key in TRACED_ARGUMENTS if key in arguments}
+        if isinstance(attributes.get('nasa_ids'), list):
+            attributes['nasa_ids'] = attributes['nasa_ids'][:20]
+        with Span(f"tool {context.message.name}", dict(attributes, tool=context.message.name)) as root:
+            result = await call_next(context)
+            structured = getattr(result, 'structured_content', None)
+            if isinstance(structured, dict) and structured.get('error'):
+                root.set_error(str(structured['error']))
+            return result